@@ -1,5 +1,8 @@
 import networkx as nx
-from copy import deepcopy
+from networkx.algorithms.flow import preflow_push
+import numpy as np
+from residual_csr import ResidualCSR, karp_min_mean_cycle, karp_min_mean_cycles, successive_shortest_paths
+from print_funcs import print_residual_graph_state
 
 def print_graph_with_flows(G, flow_dict, capacity_attr="capacity"):
     print("\n=== Graph with Flows ===")
@@ -8,54 +11,69 @@ def print_graph_with_flows(G, flow_dict, capacity_attr="capacity"):
         cap = data.get(capacity_attr, "?")
         print(f"{u} -> {v} | flow = {flow} / capacity = {cap}")
 
-def print_residual_graph_state(R, cycle=None):
+def search_sccs(csr, cap_mask, sccs):
     """
-    Prints the state of the residual graph to the console for a given iteration.
+    Runs the compiled Karp minimum mean cycle search on every SCC in `sccs`
+    and returns [(comp, arcs), ...] for those holding a negative cycle.
+    More than two SCCs are searched in parallel (one thread per SCC); for one
+    or two the thread start-up is not worth it.
     """
-    print(f"\n========================================================")
-    print(f"========================================================")
-    
-    # 1. Print cycle information if found
-    if cycle:
-        cycle_edges = []
-        cycle_cost = 0
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            # Use .get for safety, although the cycle should only contain existing edges
-            weight = R[u][v].get("weight", 0)
-            cycle_cost += weight
-            cycle_edges.append(f"({u} -> {v})")
-            
-        print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
-    else:
-        print("No Negative Cycle Found. Termination condition met.")
-
-    # 2. Print all residual edges
-    print("\nResidual Edges (u -> v: Cap, Cost):")
-    edges_to_print = []
-    for u, v, data in R.edges(data=True):
-        cap = data["capacity"]
-        weight = data["weight"]
-        # Highlight cycle edges in the printout
-        if cycle:
-            is_cycle_edge = False
-            for i in range(len(cycle) - 1):
-                if (u, v) == (cycle[i], cycle[i+1]):
-                    is_cycle_edge = True
-                    break
-            
-            label = f"   * {u} -> {v}: ({cap}, {weight})" if is_cycle_edge else f"     {u} -> {v}: ({cap}, {weight})"
-        else:
-            label = f"     {u} -> {v}: ({cap}, {weight})"
-            
-        edges_to_print.append(label)
-        
-    for label in sorted(edges_to_print):
-         print(label)
-    print(f"========================================================\n")
-
-def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None):
+    if len(sccs) <= 2:
+        found = []
+        for comp in sccs:
+            nodes = np.array([csr.node_idx[v] for v in comp], dtype=np.int64)
+            arcs = karp_min_mean_cycle(csr.indptr, csr.tail, csr.head, csr.cost, cap_mask, nodes)
+            if len(arcs):
+                found.append((comp, arcs))
+        return found
+
+    # flatten the SCCs into one node array plus offsets
+    scc_nodes = np.array([csr.node_idx[v] for comp in sccs for v in comp], dtype=np.int64)
+    scc_ptr = np.zeros(len(sccs) + 1, dtype=np.int64)
+    np.cumsum([len(comp) for comp in sccs], out=scc_ptr[1:])
+
+    cycle_arcs, cycle_len = karp_min_mean_cycles(csr.indptr, csr.tail, csr.head, csr.cost,
+                                                 cap_mask, scc_nodes, scc_ptr)
+    return [(comp, cycle_arcs[scc_ptr[i]:scc_ptr[i] + cycle_len[i]])
+            for i, comp in enumerate(sccs) if cycle_len[i]]
+
+def validate_flow_network(G, s, t, weight="weight", capacity="capacity"):
+    """
+    Checks that G is a DiGraph containing s and t whose edges all carry a
+    non-negative capacity and weight. Raises TypeError / ValueError otherwise.
+
+    cycle_cancelling runs this unless validate=False; callers that solve the
+    same graph repeatedly can validate once up front and skip it afterwards.
+    """
+    if not isinstance(G, nx.DiGraph):
+        raise TypeError("Input graph must be a directed graph (DiGraph).")
+
+    if s not in G.nodes:
+        raise ValueError("Source node does not exist in graph.")
+
+    if t not in G.nodes:
+        raise ValueError("Target node does not exist in graph.")
+
+    # one dict lookup per attribute; None marks a missing one. The raw
+    # adjacency dicts skip the tuple building of G.edges(data=True).
+    for u, nbrs in G._adj.items():
+        for v, data in nbrs.items():
+            c = data.get(capacity)
+            w = data.get(weight)
+
+            if c is None:
+                raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
+            if c < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative capacity.")
+
+            if w is None:
+                raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
+            #the algorithm can run on negative too - think of delete it
+            if w < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative weight ({w}).")
+
+def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None,
+                     method=None, validate=True, debug=False):
     """
     Cycle-Cancelling algorithm for Minimum-Cost Flow.
     
@@ -65,190 +83,172 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         t : target node
         weight : edge attribute for cost
         capacity : edge attribute for capacity
+        flow_func : networkx max-flow routine for the initial flow. Default:
+            SciPy's compiled Dinic for integral capacities, else preflow_push
+        negative_cycle_func : optional networkx-style finder f(R, source, weight)
+            run per SCC; by default a compiled Karp minimum mean cycle runs
+            directly on the CSR arrays
+        method : "ssp" (successive shortest paths with Dijkstra, compiled) or
+            "cycle" (cycle cancelling). Default: "cycle" if negative_cycle_func
+            is given, else "ssp". "ssp" falls back to cycle cancelling if the
+            weights hold a negative-cost cycle (only with validate=False).
+        validate : run validate_flow_network on the input first
+        debug : print the residual graph / flows while cancelling
     
     Returns:
         (flow_dict, min_cost)
     """
-    default_negative_cycle_func = nx.find_negative_cycle
-
     # --------------------------------------------------------
     # 1. PARAMETER VALIDATION
     # --------------------------------------------------------
 
-    if not isinstance(G, nx.DiGraph):
-        raise TypeError("Input graph must be a directed graph (DiGraph).")
+    if validate:
+        validate_flow_network(G, s, t, weight=weight, capacity=capacity)
 
-    if s not in G.nodes:
-        raise ValueError("Source node does not exist in graph.")
+    if method is None:
+        method = "cycle" if negative_cycle_func is not None else "ssp"
+    if method not in ("ssp", "cycle"):
+        raise ValueError(f"Unknown method {method!r}, expected 'ssp' or 'cycle'.")
 
-    if t not in G.nodes:
-        raise ValueError("Target node does not exist in graph.")
-
-    for u, v, data in G.edges(data=True):
-        if capacity not in data:
-            raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
-        if data[capacity] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative capacity.")
-
-        if weight not in data:
-            raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
-        #the algorithm can run on negative too - think of delete it
-        if data[weight] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative weight ({data[weight]}).")
-        
-    if negative_cycle_func is None:
-        negative_cycle_func = default_negative_cycle_func
-    
-    if not callable (negative_cycle_func):
+    if negative_cycle_func is not None and not callable(negative_cycle_func):
         raise nx.NetworkXError("finding negative cycle func has to be callable.")
 
     # --------------------------------------------------------
-    # 2. INITIAL MAX-FLOW (IGNORE COSTS)
-    # --------------------------------------------------------
-    
-    # We temporarily build a capacity-only graph
-    G_cap = nx.DiGraph()
-    for u, v, data in G.edges(data=True):
-        G_cap.add_edge(u, v, capacity=data[capacity])
-
-    max_flow_return = nx.maximum_flow(G_cap, s, t, flow_func=None)  # flow_dict is a nested dict
-    flow_dict = max_flow_return[1]
-
-    
-
-    for u, v in G_cap.edges():
-        # If node u has no outgoing flow dict, create one
-        if u not in flow_dict:
-            flow_dict[u] = {}
-
-        # If edge (u, v) not assigned by max-flow, its flow is 0
-        if v not in flow_dict[u]:
-            flow_dict[u][v] = 0
-
-    print_graph_with_flows(G_cap, flow_dict)
-    
-
-    # --------------------------------------------------------
-    # 3. BUILD INITIAL RESIDUAL GRAPH
+    # 2. BUILD RESIDUAL ARRAYS (ONCE)
     # --------------------------------------------------------
-    
-    def build_residual(G, flow):
-        R = nx.DiGraph()
-        for u, v, data in G.edges(data=True):
-            cap = data[capacity]
-            w = data[weight]
 
-            f = flow.get(u, {}).get(v, 0)
-            residual_fwd = cap - f
-            residual_bwd = f
+    # node/edge ids, CSR adjacency and flow[] live in flat arrays;
+    # the residual capacities are derived from flow[] on demand
+    csr = ResidualCSR(G, capacity=capacity, weight=weight)
 
-            # forward edge (u -> v)
-            if residual_fwd > 0:
-                R.add_edge(u, v, capacity=residual_fwd, weight=w)
-
-            # backward edge (v -> u)
-            if residual_bwd > 0:
-                R.add_edge(v, u, capacity=residual_bwd, weight=-w)
-
-        return R
+    if method == "ssp":
+        # the zero flow has no negative residual cycle unless the edges form
+        # one, so successive shortest paths ends in a min-cost max-flow — no
+        # max-flow seed and no cycle cancelling needed
+        if successive_shortest_paths(csr.indptr, csr.tail, csr.head, csr.cost,
+                                     csr.edge_id, csr.is_reverse, csr.cap, csr.flow,
+                                     csr.node_idx[s], csr.node_idx[t]):
+            return csr.flow_dict(), csr.total_cost()
+        # negative-cost cycle among the edges: fall back to cycle cancelling
 
     # --------------------------------------------------------
-    # Helper: increase flow on edges of a cycle
+    # 3. INITIAL MAX-FLOW (IGNORE COSTS)
     # --------------------------------------------------------
 
-    def augment_cycle(flow, cycle, bottleneck):
-        """Increase flow along cycle edges by bottleneck."""
-        for i in range(len(cycle)-1):
-            u = cycle[i]
-            v = cycle[i+1]
-
-            if G.has_edge(u, v):  
-                # forward edge (u→v)
-                flow.setdefault(u, {}).setdefault(v, 0)
-                flow[u][v] += bottleneck
-
-            elif G.has_edge(v, u):  
-                # backward edge (v→u)
-                flow.setdefault(v, {}).setdefault(u, 0)
-                flow[v][u] -= bottleneck  # reduce forward flow
+    if flow_func is None and csr.integral_capacities():
+        # compiled Dinic straight on the arrays
+        csr.max_flow(s, t)
+    else:
+        # max-flow only reads the capacity attribute, so run it on G itself
+        max_flow_return = nx.maximum_flow(G, s, t, capacity=capacity, flow_func=flow_func or preflow_push)  # flow_dict is a nested dict
+        csr.set_flow(max_flow_return[1])
 
-            else:
-                raise RuntimeError("Cycle edge not found in original graph.")
+    if debug:
+        print_graph_with_flows(G, csr.flow_dict())
 
     # --------------------------------------------------------
     # 4. MAIN LOOP — CANCEL NEGATIVE CYCLES
     # --------------------------------------------------------
 
+    # no live residual arc with negative cost means no negative cycle:
+    # skip the cancelling loop entirely
+    if not csr.has_negative_arc():
+        return csr.flow_dict(), csr.total_cost()
+
+    # SCCs of the residual graph that still have to be searched.
+    # Cancelling a cycle only changes arcs inside the SCC it was found in
+    # (the cycle arcs and their reverses), so every other SCC keeps its
+    # membership — and an SCC without a negative cycle never gets one.
+    # Only an SCC whose cycle saturated an arc is re-split.
+    # By default each SCC is searched for its minimum mean cycle (Karp), which
+    # bounds the number of cancellations polynomially; a generic negative
+    # cycle finder does not.
+    pending = None
+    dirty = []
+
+    # the networkx residual graph is only needed by a custom finder: build it
+    # once and patch the cancelled cycle's edges after each augment
+    R = csr.to_networkx() if negative_cycle_func is not None else None
+
     while True:
 
-        print_graph_with_flows(G, flow_dict)
+        cap_mask = csr.residual() > 0
 
-        R = build_residual(G, flow_dict)
+        if debug:
+            print_graph_with_flows(G, csr.flow_dict())
+            print_residual_graph_state(R if R is not None else csr.to_networkx(), None)
 
-        print_residual_graph_state(R, None)
+        if pending is None:
+            pending = csr.strongly_connected_components(cyclic_only=True)
+        elif dirty:
+            # no arc joins two dirty SCCs, so splitting their union is the same
+            # as splitting each of them
+            pending.extend(csr.strongly_connected_components(set().union(*dirty), cyclic_only=True))
+            dirty = []
 
-        cycle_found = False  # will flip to True if we find & cancel a negative cycle
+        found = []   # (comp, arcs) of the cycles to cancel in this iteration
 
-        # Iterate over strongly connected components of the residual graph
-        for comp in nx.strongly_connected_components(R):
-            # (optional) Skip trivial SCCs that cannot contain a cycle (no self-loop)
-            if len(comp) == 1:
-                u = next(iter(comp))
-                if not R.has_edge(u, u):
+        if negative_cycle_func is None:
+            # Search every pending SCC at once. The SCCs are disjoint and a
+            # cycle never leaves its SCC, so all cycles found touch different
+            # edges and can be cancelled in the same pass.
+            found = search_sccs(csr, cap_mask, pending)
+            pending = []
+        else:
+            # Iterate over strongly connected components of the residual graph
+            while pending:
+                # trivial SCCs (one node, no self-loop) are already filtered out
+                comp = pending.pop()
+
+                # Induced subgraph on this SCC
+                subR = R.subgraph(comp)   # read-only view, the finders never mutate it
+                start = next(iter(comp))
+
+                try:
+                    # Try to find a negative cycle inside this SCC
+                    cycle = negative_cycle_func(subR, start, weight="weight")
+                except nx.NetworkXError:
+                    # No negative cycle in this SCC — it is never searched again
                     continue
 
-            # Induced subgraph on this SCC
-            subR = R.subgraph(comp).copy()
-            start = next(iter(comp))
+                # map every cycle edge to its residual arc (CSR slot)
+                arcs = [R[cycle[i]][cycle[i + 1]]["arc"] for i in range(len(cycle) - 1)]
+                found.append((comp, arcs))
+                # Important: stop here and search again in the next outer iteration
+                break
 
-            try:
-                # Try to find a negative cycle inside this SCC
-                cycle = negative_cycle_func(subR, start, weight="weight")
-
-                print_residual_graph_state(R, cycle)
-            except nx.NetworkXError:
-                # No negative cycle reachable from this start node in this SCC
-                continue
+        if not found:
+            # No negative cycle in any SCC ⇒ algorithm terminates
+            break
 
-            # If we reach here, we found a negative cycle in this SCC.
-            # Nodes/edges are the same as in R, so we use R for capacities.
-            #print_residual_graph_state(R, cycle)
+        for comp, arcs in found:
+            if debug:
+                print_residual_graph_state(R if R is not None else csr.to_networkx(),
+                                           csr.cycle_nodes(arcs))
 
             # ---- your bottleneck & augment logic, now "per SCC" ----
-            bottleneck = float("inf")
-            for i in range(len(cycle) - 1):
-                u = cycle[i]
-                v = cycle[i + 1]
-                cap = R[u][v]["capacity"]
-                if cap < bottleneck:
-                    bottleneck = cap
-            print(f"the Bottleneck is : {bottleneck}")
+            bottleneck = csr.residual(arcs).min()
+            if debug:
+                print(f"the Bottleneck is : {bottleneck}")
             if bottleneck <= 0:
                 raise RuntimeError("Residual bottleneck is non-positive (should not happen).")
 
-            augment_cycle(flow_dict, cycle, bottleneck)
+            # only the flow[] slots of the cycle edges change
+            csr.augment(arcs, bottleneck)
+            if R is not None:
+                csr.update_networkx(R, arcs)
 
+            # the bottleneck arc is now saturated: comp may have split apart
+            dirty.append(comp)
 
-
-            cycle_found = True
-            # Important: break here and rebuild residual in the next outer iteration
-            break
-
-        if not cycle_found:
-            # No negative cycle in any SCC ⇒ algorithm terminates
-            #print_residual_graph_state(R, None)
-            break
-
+    flow_dict = csr.flow_dict()
 
     # --------------------------------------------------------
     # 5. COMPUTE FINAL MINIMUM COST
     # --------------------------------------------------------
 
-    min_cost = 0
-    for u, nbrs in flow_dict.items():
-        for v, f in nbrs.items():
-            if f > 0:  # only forward flows
-                min_cost += f * G[u][v][weight]
+    # flow[] only holds the (non-negative) flow of the original edges
+    min_cost = csr.total_cost()
 
     return flow_dict, min_cost
 
@@ -1,7 +1,10 @@
 import networkx as nx
-from copy import deepcopy
+from networkx.algorithms.flow import preflow_push
 import math
 
+from residual_csr import ResidualCSR, cancel_one_cycle
+from print_funcs import print_residual_graph_state
+
 def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
     """
     Finds the minimum mean negative cycle using Karp's Algorithm.
@@ -15,7 +18,6 @@ def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
     # STEP 1: PREPROCESS -------------------------------------------------------
     # Cycle-cancelling residual graphs are MultiDiGraphs
     # Karp's DP requires a simple DiGraph where we use the cheapest edge
-    print("karp bitch")
     if G.is_multigraph():
         S = nx.DiGraph()
         for u, v, data in G.edges(data=True):
@@ -118,54 +120,8 @@ def print_graph_with_flows(G, flow_dict, capacity_attr="capacity"):
         cap = data.get(capacity_attr, "?")
         print(f"{u} -> {v} | flow = {flow} / capacity = {cap}")
 
-def print_residual_graph_state(R, cycle=None):
-    """
-    Prints the state of the residual graph to the console for a given iteration.
-    """
-    print(f"\n========================================================")
-    print(f"========================================================")
-    
-    # 1. Print cycle information if found
-    if cycle:
-        cycle_edges = []
-        cycle_cost = 0
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            # Use .get for safety, although the cycle should only contain existing edges
-            w = R[u][v].get("weight", 0)
-            cycle_cost += w
-            cycle_edges.append(f"({u} -> {v})")
-            
-        print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
-    else:
-        print("No Negative Cycle Found. Termination condition met.")
-
-    # 2. Print all residual edges
-    print("\nResidual Edges (u -> v: Cap, Cost):")
-    edges_to_print = []
-    for u, v, data in R.edges(data=True):
-        cap = data["capacity"]
-        weight = data["weight"]
-        # Highlight cycle edges in the printout
-        if cycle:
-            is_cycle_edge = False
-            for i in range(len(cycle) - 1):
-                if (u, v) == (cycle[i], cycle[i+1]):
-                    is_cycle_edge = True
-                    break
-            
-            label = f"   * {u} -> {v}: ({cap}, {weight})" if is_cycle_edge else f"     {u} -> {v}: ({cap}, {weight})"
-        else:
-            label = f"     {u} -> {v}: ({cap}, {weight})"
-            
-        edges_to_print.append(label)
-        
-    for label in sorted(edges_to_print):
-         print(label)
-    print(f"========================================================\n")
-
-def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None):
+def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None,
+                     debug=False):
     """
     Cycle-Cancelling algorithm for Minimum-Cost Flow.
     
@@ -175,12 +131,16 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         t : target node
         weight : edge attribute for cost
         capacity : edge attribute for capacity
+        flow_func : networkx max-flow routine for the initial flow
+            (default: preflow_push)
+        negative_cycle_func : finder run per SCC of a networkx residual graph
+            (e.g. find_minimum_mean_negative_cycle). Default None uses the
+            fused compiled Bellman–Ford (cancel_one_cycle) on CSR arrays.
+        debug : print the residual graph / progress while cancelling
     
     Returns:
         (flow_dict, min_cost)
     """
-    default_negative_cycle_func = find_minimum_mean_negative_cycle
-    #default_negative_cycle_func = nx.find_negative_cycle
 
     # --------------------------------------------------------
     # 1. PARAMETER VALIDATION
@@ -195,39 +155,38 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     if t not in G.nodes:
         raise ValueError("Target node does not exist in graph.")
 
-    for u, v, data in G.edges(data=True):
-        if capacity not in data:
-            raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
-        if data[capacity] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative capacity.")
-
-        if weight not in data:
-            raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
-        #the algorithm can run on negative too - think of delete it
-        if data[weight] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative weight ({data[weight]}).")
+    # one dict lookup per attribute; None marks a missing one. The raw
+    # adjacency dicts skip the tuple building of G.edges(data=True).
+    for u, nbrs in G._adj.items():
+        for v, data in nbrs.items():
+            c = data.get(capacity)
+            w = data.get(weight)
+
+            if c is None:
+                raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
+            if c < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative capacity.")
+
+            if w is None:
+                raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
+            #the algorithm can run on negative too - think of delete it
+            if w < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative weight ({w}).")
         
-    if negative_cycle_func is None:
-        negative_cycle_func = default_negative_cycle_func
-    
-    if not callable (negative_cycle_func):
+    if negative_cycle_func is not None and not callable(negative_cycle_func):
         raise nx.NetworkXError("finding negative cycle func has to be callable.")
 
     # --------------------------------------------------------
     # 2. INITIAL MAX-FLOW (IGNORE COSTS)
     # --------------------------------------------------------
     
-    # We temporarily build a capacity-only graph
-    G_cap = nx.DiGraph()
-    for u, v, data in G.edges(data=True):
-        G_cap.add_edge(u, v, capacity=data[capacity])
-
-    max_flow_return = nx.maximum_flow(G_cap, s, t, flow_func=None)  # flow_dict is a nested dict
+    # max-flow only reads the capacity attribute, so run it on G itself
+    max_flow_return = nx.maximum_flow(G, s, t, capacity=capacity, flow_func=flow_func or preflow_push)  # flow_dict is a nested dict
     flow_dict = max_flow_return[1]
 
     
 
-    for u, v in G_cap.edges():
+    for u, v in G.edges():
         # If node u has no outgoing flow dict, create one
         if u not in flow_dict:
             flow_dict[u] = {}
@@ -236,47 +195,53 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         if v not in flow_dict[u]:
             flow_dict[u][v] = 0
 
-    #print_graph_with_flows(G_cap, flow_dict)
+    #print_graph_with_flows(G, flow_dict, capacity_attr=capacity)
     
 
     # --------------------------------------------------------
     # 3. BUILD INITIAL RESIDUAL GRAPH
     # --------------------------------------------------------
     
+    # Group each edge with its opposite edge once: {(u, v): [(u, v), (v, u) or None]}.
+    # Both edges of a pair feed the residual arcs u->v and v->u.
+    edge_pairs = {}
+    for u, v in G.edges():
+        if (v, u) in edge_pairs and u != v:
+            edge_pairs[(v, u)][1] = (u, v)
+        else:
+            edge_pairs[(u, v)] = [(u, v), None]
+
+    # capacity / cost per edge, read once instead of G[u][v][...] per rebuild
+    cap_of = {(u, v): c for u, v, c in G.edges(data=capacity)}
+    cost_of = {(u, v): w for u, v, w in G.edges(data=weight)}
+
     def build_residual(G, flow):
-        # We use MultiDiGraph because u->v might have a forward residual edge 
-        # AND a backward residual edge from the opposite original edge v->u.
+        # A plain DiGraph holds one residual edge per ordered pair. If u->v gets
+        # both a forward residual (from G[u][v]) and a backward one (from
+        # G[v][u]), the cheaper one is kept — the only one a negative cycle
+        # would ever use — together with its type.
         R = nx.DiGraph()
-        print("created empty R")
-        for u, v, data in G.edges(data=True):
-            print("residual for started")
-            cap = data[capacity]
-            print(f"HERE THE BUG the edges data is: {data} ")
-            w = data[weight]
-            print("FUCK WEIGHT")
-            f = flow.get(u, {}).get(v, 0)
-            print("IS THE FLOW THE PROBLEM")
-
-            # Forward residual edge: can push (cap - f) more flow at cost 'w'
-            # for negative cycle, we need only the bwd edge, otherwise we work with an edge without flow
-            if f < cap:
-                if R.has_edge(u, v):
-                    print("OR THE EDGE")
-                    if R[u][v]["type"] == "bwd":
-                        print("MAYBE THE CONTINUE")
-                        continue
-                else:
-                    R.add_edge(u, v, weight=w, capacity=cap - f, type='fwd')
-                print("residual fwd added")
-            
-            # Backward residual edge: can push 'f' back at cost '-w'
-            if f > 0:
-                if R.has_edge(v, u):
-                    if R[v][u]["type"] == "fwd":
-                        R.remove_edge(v, u)
-                R.add_edge(v, u, weight=-w, capacity=f, type='bwd')
-                print("residual bwd added")
-                
+        for pair in edge_pairs.values():
+            best = {}   # (x, y) -> (weight, capacity, type)
+            for edge in pair:
+                if edge is None:
+                    continue
+                u, v = edge
+                cap = cap_of[edge]
+                w = cost_of[edge]
+                f = flow.get(u, {}).get(v, 0)
+
+                # Forward residual edge: can push (cap - f) more flow at cost 'w'
+                if f < cap and ((u, v) not in best or w < best[(u, v)][0]):
+                    best[(u, v)] = (w, cap - f, 'fwd')
+
+                # Backward residual edge: can push 'f' back at cost '-w'
+                if f > 0 and ((v, u) not in best or -w < best[(v, u)][0]):
+                    best[(v, u)] = (-w, f, 'bwd')
+
+            for (x, y), (w, cap, kind) in best.items():
+                R.add_edge(x, y, weight=w, capacity=cap, type=kind)
+
         return R
 
     # --------------------------------------------------------
@@ -285,127 +250,152 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
 
     def augment_cycle(flow, cycle, bottleneck):
         """Increase flow along cycle edges by bottleneck."""
+        # The residual edge's type already says which edge of G it came from
+        # (fwd: (u, v), bwd: (v, u)), and flow has an entry for every edge of G,
+        # so one lookup in R replaces the has_edge checks on G and R.
         for i in range(len(cycle)-1):
-            print("augmen for started")
             u = cycle[i]
             v = cycle[i+1]
 
-            if G.has_edge(u, v) and R.has_edge(u,v) and R[u][v]["type"] == "fwd":  
+            if R[u][v]["type"] == "fwd":
                 # forward edge (u→v)
-                flow.setdefault(u, {}).setdefault(v, 0)
                 flow[u][v] += bottleneck
-                print("augmen bottle added")
-
-            elif G.has_edge(v, u) and R.has_edge(u,v) and R[u][v]["type"] == "bwd":  
+            else:
                 # backward edge (v→u)
-                flow.setdefault(v, {}).setdefault(u, 0)
                 flow[v][u] -= bottleneck  # reduce forward flow
-                print("augmen bottle -")
-
-            else:
-                print("thats the fucking error in augmen")
-                raise RuntimeError("Cycle edge not found in original graph.")
 
     # --------------------------------------------------------
     # 4. MAIN LOOP — CANCEL NEGATIVE CYCLES
     # --------------------------------------------------------
 
-    while True:
+    # CSR copy of G: the fused kernel runs on it, the finder path uses it for
+    # the compiled SCC split
+    csr = ResidualCSR(G, capacity=capacity, weight=weight)
+    csr.set_flow(flow_dict)
 
-        #print_graph_with_flows(G, flow_dict)
+    # no live residual arc with negative cost means no negative cycle:
+    # skip the cancelling loop entirely
+    if not csr.has_negative_arc():
+        return flow_dict, csr.total_cost()
 
-        R = build_residual(G, flow_dict)
+    if negative_cycle_func is None:
+        # fused compiled path: Bellman–Ford reads residual capacities straight
+        # from cap/flow and augments the cycle in place, so no residual graph
+        # is built between iterations
+        while cancel_one_cycle(csr.indptr, csr.tail, csr.head, csr.cost,
+                               csr.edge_id, csr.is_reverse, csr.cap, csr.flow, -1):
+            pass
+        flow_dict = csr.flow_dict()
 
-        print("BUILT R")
+    else:
+        sccs = None
+        last_comp = None   # SCC of the last cancelled cycle
 
-        #print_residual_graph_state(R, None)
+        while True:
 
-        cycle_found = False  # will flip to True if we find & cancel a negative cycle
+            #print_graph_with_flows(G, flow_dict)
 
-        # Iterate over strongly connected components of the residual graph
-        for comp in nx.strongly_connected_components(R):
-            print("START SCC FOR")
-            # (optional) Skip trivial SCCs that cannot contain a cycle (no self-loop)
-            if len(comp) == 1:
-                u = next(iter(comp))
-                if not R.has_edge(u, u):
-                    continue
+            R = build_residual(G, flow_dict)
+            csr.set_flow(flow_dict)
+
+            # Augmenting a cycle only saturates or opens arcs between nodes of
+            # the SCC that held it, so only that SCC can split; the others are
+            # reused as they are. Its pieces are searched first.
+            if sccs is None:
+                sccs = csr.strongly_connected_components(cyclic_only=True)
+            else:
+                sccs = (csr.strongly_connected_components(last_comp, cyclic_only=True)
+                        + [comp for comp in sccs if comp is not last_comp])
+
+            if debug:
+                print("BUILT R")
 
-            # Induced subgraph on this SCC
-            subR = R.subgraph(comp).copy()
-            print("COPPIED R")
-            start = next(iter(comp))
-
-            try:
-                # Try to find a negative cycle inside this SCC
-                cycle = negative_cycle_func(subR, start, weight="weight")
-                print("SEARCHING CYCLE DONE")
-                if cycle:
-                    cycle_edges = []
-                    cycle_cost = 0
-                    for i in range(len(cycle) - 1):
-                        u = cycle[i]
-                        v = cycle[i + 1]
-                        # Use .get for safety, although the cycle should only contain existing edges
-                        w = R[u][v].get("weight", 0)
-                        cycle_cost += w
-                        cycle_edges.append(f"({u} -> {v})")
+            #print_residual_graph_state(R, None)
+
+            cycle_found = False  # will flip to True if we find & cancel a negative cycle
+
+            # Iterate over strongly connected components of the residual graph;
+            # trivial SCCs (one node, no self-loop) are dropped by the SciPy labels
+            for comp in sccs:
+                if debug:
+                    print("START SCC FOR")
+
+                # Induced subgraph on this SCC
+                subR = R.subgraph(comp)   # read-only view, the finders never mutate it
+                if debug:
+                    print("COPPIED R")
+                start = next(iter(comp))
+
+                try:
+                    # Try to find a negative cycle inside this SCC
+                    cycle = negative_cycle_func(subR, start, weight="weight")
+                    if debug:
+                        print("SEARCHING CYCLE DONE")
+                    if cycle:
+                        cycle_edges = []
+                        cycle_cost = 0
+                        for i in range(len(cycle) - 1):
+                            u = cycle[i]
+                            v = cycle[i + 1]
+                            # Use .get for safety, although the cycle should only contain existing edges
+                            w = R[u][v].get("weight", 0)
+                            cycle_cost += w
+                            cycle_edges.append(f"({u} -> {v})")
             
-                    print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
-                    print(f"the cycle cost: {cycle_cost}")
-                    if cycle_cost >= 0 :
-                        continue
-                print_residual_graph_state(R, cycle)
-            except nx.NetworkXError:
-                print("NO CYCLE")
-                # No negative cycle reachable from this start node in this SCC
-                continue
-
-            # If we reach here, we found a negative cycle in this SCC.
-            # Nodes/edges are the same as in R, so we use R for capacities.
-            #print_residual_graph_state(R, cycle)
+                        if debug:
+                            print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
+                            print(f"the cycle cost: {cycle_cost}")
+                        if cycle_cost >= 0 :
+                            continue
+                    if debug:
+                        print_residual_graph_state(R, cycle)
+                except nx.NetworkXError:
+                    if debug:
+                        print("NO CYCLE")
+                    # No negative cycle reachable from this start node in this SCC
+                    continue
+
+                # If we reach here, we found a negative cycle in this SCC.
+                # Nodes/edges are the same as in R, so we use R for capacities.
+                #print_residual_graph_state(R, cycle)
             
-            # ---- your bottleneck & augment logic, now "per SCC" ----
-            bottleneck = float("inf")
-            for i in range(len(cycle) - 1):
-                u = cycle[i]
-                v = cycle[i + 1]
-                cap = R[u][v]["capacity"]
-                if cap < bottleneck:
-                    bottleneck = cap
-            print(f"the Bottleneck is : {bottleneck}")
-            if bottleneck <= 0:
-                print("IS THE BOTTLE FUCKING NEGATIVE?!")
-                raise RuntimeError("Residual bottleneck is non-positive (should not happen).")
-
-            print("BEFORE AUGM")
-            augment_cycle(flow_dict, cycle, bottleneck)
-            print("AFTER AUG")
-
-
-
-            cycle_found = True
-            # Important: break here and rebuild residual in the next outer iteration
-            break
-
-        if not cycle_found:
-            print("NEED TO ENDDD*******************************************************************************************")
-            # No negative cycle in any SCC ⇒ algorithm terminates
-            #print_residual_graph_state(R, None)
-            break
+                # ---- your bottleneck & augment logic, now "per SCC" ----
+                # R._succ is the raw adjacency dict: one lookup per step, no view layer
+                succ = R._succ
+                bottleneck = min(succ[u][v]["capacity"] for u, v in zip(cycle, cycle[1:]))
+                if debug:
+                    print(f"the Bottleneck is : {bottleneck}")
+                if bottleneck <= 0:
+                    if debug:
+                        print("bottleneck is non-positive")
+                    raise RuntimeError("Residual bottleneck is non-positive (should not happen).")
+
+                if debug:
+                    print("BEFORE AUGM")
+                augment_cycle(flow_dict, cycle, bottleneck)
+                if debug:
+                    print("AFTER AUG")
+                last_comp = comp
+
+
+
+                cycle_found = True
+                # Important: break here and rebuild residual in the next outer iteration
+                break
+
+            if not cycle_found:
+                if debug:
+                    print("no negative cycle left; stopping")
+                # No negative cycle in any SCC ⇒ algorithm terminates
+                #print_residual_graph_state(R, None)
+                break
 
 
     # --------------------------------------------------------
     # 5. COMPUTE FINAL MINIMUM COST
     # --------------------------------------------------------
-    print ("calculating min cost")
-    min_cost = 0
-    for u, nbrs in flow_dict.items():
-        print("FLOW FOR")
-        for v, f in nbrs.items():
-            print("CALCULATING")
-            if f > 0:  # only forward flows
-                min_cost += f * G[u][v][weight]
+    # csr.flow matches flow_dict on both paths: one dot product over the edges
+    min_cost = csr.total_cost()
 
     return flow_dict, min_cost
 
@@ -1,55 +1,67 @@
 import networkx as nx
-from copy import deepcopy
-import matplotlib.pyplot as plt
+import numpy as np
+import sys
+from networkx.algorithms.flow import preflow_push
+from residual_csr import (ResidualCSR, HAVE_NUMBA, SMALL_N, bellman_ford_negcycle_warm, karp_min_mean_cycle,
+                          scipy_negative_cycle, small_negative_cycle, successive_shortest_paths)
+from print_funcs import print_residual_graph_state
 
-def print_residual_graph_state(R, cycle=None):
+# the virtual node prepended to R before calling a negative_cycle_func; a
+# private object, so it can never coincide with a node label of G
+SUPER_SOURCE = object()
+
+
+def negative_cycle_arcs(csr, cap_mask, dist):
     """
-    Prints the state of the residual graph to the console for a given iteration.
+    Default cycle search on the CSR arrays: the Numba kernel, warm-started
+    from dist (updated in place). Without Numba, small graphs run a generated
+    Bellman–Ford unrolled for their arc list, larger ones SciPy's compiled
+    Bellman–Ford.
     """
-    print(f"\n========================================================")
-    print(f"========================================================")
-    
-    # 1. Print cycle information if found
-    if cycle:
-        cycle_edges = []
-        cycle_cost = 0
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            # Use .get for safety, although the cycle should only contain existing edges
-            weight = R[u][v].get("weight", 0)
-            cycle_cost += weight
-            cycle_edges.append(f"({u} -> {v})")
-            
-        print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
-    else:
-        print("No Negative Cycle Found. Termination condition met.")
-
-    # 2. Print all residual edges
-    print("\nResidual Edges (u -> v: Cap, Cost):")
-    edges_to_print = []
-    for u, v, data in R.edges(data=True):
-        cap = data["capacity"]
-        weight = data["weight"]
-        # Highlight cycle edges in the printout
-        if cycle:
-            is_cycle_edge = False
-            for i in range(len(cycle) - 1):
-                if (u, v) == (cycle[i], cycle[i+1]):
-                    is_cycle_edge = True
-                    break
-            
-            label = f"   * {u} -> {v}: ({cap}, {weight})" if is_cycle_edge else f"     {u} -> {v}: ({cap}, {weight})"
-        else:
-            label = f"     {u} -> {v}: ({cap}, {weight})"
-            
-        edges_to_print.append(label)
-        
-    for label in sorted(edges_to_print):
-         print(label)
-    print(f"========================================================\n")
+    if HAVE_NUMBA:
+        return bellman_ford_negcycle_warm(csr.indptr, csr.tail, csr.head, csr.cost, cap_mask, dist)
+    if csr.n <= SMALL_N:
+        return small_negative_cycle(csr.tail, csr.head, csr.cost, cap_mask, dist)
+    return scipy_negative_cycle(csr.indptr, csr.tail, csr.head, csr.cost, cap_mask, csr.n, -1)
+
+
+def validate_flow_network(G, s, t, weight="weight", capacity="capacity"):
+    """
+    Checks that G is a DiGraph containing s and t whose edges all carry a
+    non-negative capacity and weight. Raises TypeError / ValueError otherwise.
+
+    cycle_cancelling runs this unless validate=False; callers that solve the
+    same graph repeatedly can validate once up front and skip it afterwards.
+    """
+    if not isinstance(G, nx.DiGraph):
+        raise TypeError("Input graph must be a directed graph (DiGraph).")
+
+    if s not in G.nodes:
+        raise ValueError("Source node does not exist in graph.")
 
-def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None):
+    if t not in G.nodes:
+        raise ValueError("Target node does not exist in graph.")
+
+    # one dict lookup per attribute; None marks a missing one. The raw
+    # adjacency dicts skip the tuple building of G.edges(data=True).
+    for u, nbrs in G._adj.items():
+        for v, data in nbrs.items():
+            c = data.get(capacity)
+            w = data.get(weight)
+
+            if c is None:
+                raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
+            if c < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative capacity.")
+
+            if w is None:
+                raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
+            #the algorithm can run on negative too - think of delete it
+            if w < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative weight ({w}).")
+
+def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None,
+                     method=None, strategy="any", validate=True, debug=False):
     """
     Cycle-Cancelling algorithm for Minimum-Cost Flow.
     
@@ -59,439 +71,180 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         t : target node
         weight : edge attribute for cost
         capacity : edge attribute for capacity
+        flow_func : networkx max-flow routine for the initial flow. Default:
+            SciPy's compiled Dinic for integral capacities, else preflow_push
+        negative_cycle_func : optional networkx-style finder f(R, source, weight);
+            by default a compiled Bellman–Ford (Numba, else SciPy) runs
+            directly on the CSR arrays
+        method : "ssp" (successive shortest paths with Dijkstra, compiled) or
+            "cycle" (cycle cancelling). Default: "cycle" if negative_cycle_func
+            is given, else "ssp". "ssp" falls back to cycle cancelling if the
+            weights hold a negative-cost cycle (only with validate=False).
+        strategy : which cycle the default finder cancels: "any" (first
+            negative cycle Bellman–Ford finds) or "min_mean" (minimum mean
+            cycle by Karp, Goldberg–Tarjan; strongly polynomial number of
+            iterations, O(V*E) per search). Not used with negative_cycle_func.
+        validate : run validate_flow_network on the input first
+        debug : print the residual graph / flows while cancelling
     
     Returns:
         (flow_dict, min_cost)
     """
-    default_negative_cycle_func = nx.find_negative_cycle
 
     # --------------------------------------------------------
     # 1. PARAMETER VALIDATION
     # --------------------------------------------------------
 
-    if not isinstance(G, nx.DiGraph):
-        raise TypeError("Input graph must be a directed graph (DiGraph).")
-
-    if s not in G.nodes:
-        raise ValueError("Source node does not exist in graph.")
+    if validate:
+        validate_flow_network(G, s, t, weight=weight, capacity=capacity)
 
-    if t not in G.nodes:
-        raise ValueError("Target node does not exist in graph.")
+    if method is None:
+        method = "cycle" if negative_cycle_func is not None else "ssp"
+    if method not in ("ssp", "cycle"):
+        raise ValueError(f"Unknown method {method!r}, expected 'ssp' or 'cycle'.")
+    if strategy not in ("any", "min_mean"):
+        raise ValueError(f"Unknown strategy {strategy!r}, expected 'any' or 'min_mean'.")
 
-    for u, v, data in G.edges(data=True):
-        if capacity not in data:
-            raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
-        if data[capacity] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative capacity.")
-
-        if weight not in data:
-            raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
-        #the algorithm can run on negative too - think of delete it
-        if data[weight] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative weight ({data[weight]}).")
-        
-    if negative_cycle_func is None:
-        negative_cycle_func = default_negative_cycle_func
-    
-    if not callable (negative_cycle_func):
+    if negative_cycle_func is not None and not callable (negative_cycle_func):
         raise nx.NetworkXError("finding negative cycle func has to be callable.")
 
     # --------------------------------------------------------
-    # 2. INITIAL MAX-FLOW (IGNORE COSTS)
+    # 2. BUILD RESIDUAL ARRAYS (ONCE)
     # --------------------------------------------------------
-    
-    # We temporarily build a capacity-only graph
-    G_cap = nx.DiGraph()
-    for u, v, data in G.edges(data=True):
-        G_cap.add_edge(u, v, capacity=data[capacity])
 
-    flow_dict = nx.maximum_flow(G_cap, s, t, flow_func=None)[1]  # flow_dict is a nested dict
+    # node/edge ids, CSR adjacency and flow[] live in flat arrays;
+    # the residual capacities are derived from flow[] on demand
+    csr = ResidualCSR(G, capacity=capacity, weight=weight)
+
+    if method == "ssp":
+        # the zero flow has no negative residual cycle unless the edges form
+        # one, so successive shortest paths ends in a min-cost max-flow — no
+        # max-flow seed and no cycle cancelling needed
+        if successive_shortest_paths(csr.indptr, csr.tail, csr.head, csr.cost,
+                                     csr.edge_id, csr.is_reverse, csr.cap, csr.flow,
+                                     csr.node_idx[s], csr.node_idx[t]):
+            return csr.flow_dict(), csr.total_cost()
+        # negative-cost cycle among the edges: fall back to cycle cancelling
 
     # --------------------------------------------------------
-    # 3. BUILD INITIAL RESIDUAL GRAPH
+    # 3. INITIAL MAX-FLOW (IGNORE COSTS)
     # --------------------------------------------------------
 
-    def build_residual(G, flow):
-        R = nx.DiGraph()
-        for u, v, data in G.edges(data=True):
-            cap = data[capacity]
-            w = data[weight]
-
-            f = flow[u][v] if v in flow[u] else 0
-            residual_fwd = cap - f
-            residual_bwd = f
-
-            # forward edge (u -> v)
-            if residual_fwd > 0:
-                R.add_edge(u, v, capacity=residual_fwd, weight=w)
-
-            # backward edge (v -> u)
-            if residual_bwd > 0:
-                R.add_edge(v, u, capacity=residual_bwd, weight=-w)
-        
-
-
-        return R
+    if flow_func is None and csr.integral_capacities():
+        # compiled Dinic straight on the arrays
+        csr.max_flow(s, t)
+    else:
+        # max-flow only reads the capacity attribute, so run it on G itself
+        flow_dict = nx.maximum_flow(G, s, t, capacity=capacity, flow_func=flow_func or preflow_push)[1]  # flow_dict is a nested dict
+        csr.set_flow(flow_dict)
 
     # --------------------------------------------------------
-    # Helper: increase flow on edges of a cycle
+    # 4. MAIN LOOP — CANCEL NEGATIVE CYCLES
     # --------------------------------------------------------
 
-    def augment_cycle(flow, cycle, bottleneck):
-        """Increase flow along cycle edges by bottleneck."""
-        for i in range(len(cycle)-1):
-            u = cycle[i]
-            v = cycle[i+1]
-
-            if G.has_edge(u, v):  
-                # forward edge (u→v)
-                flow[u][v] += bottleneck
+    # no live residual arc with negative cost means no negative cycle:
+    # skip the cancelling loop entirely
+    if not csr.has_negative_arc():
+        return csr.flow_dict(), csr.total_cost()
 
-            elif G.has_edge(v, u):  
-                # backward edge (v→u)
-                flow[v][u] -= bottleneck  # reduce forward flow
+    if negative_cycle_func is not None:
+        # the networkx residual graph is built once and patched after every
+        # augment, only on the O(|cycle|) pairs whose flow changed
+        R = csr.to_networkx()
+    else:
+        # distances start at 0 — a virtual super-source with a 0-cost arc to
+        # every node, so one Bellman–Ford covers all components of a
+        # disconnected residual graph — and carry over between iterations
+        dist = np.zeros(csr.n)
+        all_nodes = np.arange(csr.n)
 
+    while True:
+        if negative_cycle_func is None:
+            # saturated arcs are masked out instead of building a new graph
+            cap_mask = csr.residual() > 0
+            if not cap_mask.any():
+                break
+
+            # one vectorized pass over the arcs: if the carried-over dist is
+            # already a feasible potential, no negative cycle is left
+            if csr.potential_violations(dist, cap_mask).size == 0:
+                break
+
+            if strategy == "min_mean":
+                # Karp's F[k][v] table from a virtual source over all nodes
+                arcs = karp_min_mean_cycle(csr.indptr, csr.tail, csr.head, csr.cost,
+                                           cap_mask, all_nodes)
             else:
-                raise RuntimeError("Cycle edge not found in original graph.")
+                arcs = negative_cycle_arcs(csr, cap_mask, dist)
+            if len(arcs) == 0:
+                # no negative cycle — we are done
+                break
 
-    # --------------------------------------------------------
-    # 4. MAIN LOOP — CANCEL NEGATIVE CYCLES
-    # --------------------------------------------------------
+            if debug:
+                print_residual_graph_state(csr.to_networkx(), csr.cycle_nodes(arcs))
 
-    while True:
-        R = build_residual(G, flow_dict)
+        else:
+            # the residual graph may not be connected: a super-source with a
+            # 0-cost arc to every node reaches all components in one call
+            # (it has no in-arcs, so it never lies on the returned cycle)
+            R.add_weighted_edges_from(((SUPER_SOURCE, v, 0) for v in list(R)), weight="weight")
+            try:
+                cycle = negative_cycle_func(R, SUPER_SOURCE, weight="weight")
+
+            except nx.NetworkXError:
+                # no negative cycle — we are done
+                break
 
-        try:
-            # pick any source node — residual graph may not be connected
-            source_any = next(iter(R.nodes))
-            cycle = negative_cycle_func(R, source_any, weight="weight")
-            print_residual_graph_state(R, cycle)
+            finally:
+                R.remove_node(SUPER_SOURCE)
 
-        except nx.NetworkXError:
-            # no negative cycle — we are done
-            break
+            if debug:
+                print_residual_graph_state(R, cycle)
+
+            # cycle returned as [v0, v1, ..., vk, v0]
+            # map every cycle edge to its residual arc (CSR slot)
+            arcs = [R[cycle[i]][cycle[i+1]]["arc"] for i in range(len(cycle)-1)]
 
-        # cycle returned as [v0, v1, ..., vk, v0]
         # compute bottleneck = min residual capacity on cycle
-        bottleneck = float("inf")
-        for i in range(len(cycle)-1):
-            u = cycle[i]
-            v = cycle[i+1]
-            cap = R[u][v]["capacity"]
-            bottleneck = min(bottleneck, cap)
+        bottleneck = csr.residual(arcs).min()
 
         if bottleneck <= 0:
             raise RuntimeError("Residual bottleneck is non-positive (should not happen).")
 
-        augment_cycle(flow_dict, cycle, bottleneck)
+        # only the flow[] slots of the cycle edges change
+        csr.augment(arcs, bottleneck)
+
+        if negative_cycle_func is not None:
+            csr.update_networkx(R, arcs)
+
+    flow_dict = csr.flow_dict()
 
     # --------------------------------------------------------
     # 5. COMPUTE FINAL MINIMUM COST
     # --------------------------------------------------------
 
-    min_cost = 0
-    for u, nbrs in flow_dict.items():
-        for v, f in nbrs.items():
-            if f > 0:  # only forward flows
-                min_cost += f * G[u][v][weight]
+    # flow[] only holds the (non-negative) flow of the original edges
+    min_cost = csr.total_cost()
 
     return flow_dict, min_cost
 
 
 
-def build_and_draw_graph1():
-    """
-    Initializes a directed graph, adds edges with capacity and weight attributes,
-    and visualizes the graph using fixed positions for layout.
-    """
-    # 1. Initialize a directed graph
-    G = nx.DiGraph()
-
-    # 2. Define the edges with (capacity, weight) attributes
-    # Edges are defined as (source, target, {'capacity': c, 'weight': w})
-    edges_with_attributes = [
-        (0, 1, {'capacity': 10, 'weight': 1}),
-        (1, 3, {'capacity': 5, 'weight': 1}),
-        (1, 2, {'capacity': 10, 'weight': 1}),
-        (3, 6, {'capacity': 10, 'weight': 1}),
-        (3, 4, {'capacity': 5, 'weight': 3}),
-        (6, 4, {'capacity': 10, 'weight': 1}),
-        (2, 6, {'capacity': 10, 'weight': 1}),
-        (2, 4, {'capacity': 7, 'weight': 4}),
-        (4, 5, {'capacity': 15, 'weight': 1}),
-    ]
-
-    # 3. Add all edges and their attributes to the graph
-    G.add_edges_from(edges_with_attributes)
-
-    # 4. Define node positions to match the visual layout in the image
-    pos = {
-        0: (-3.0, 0.0),
-        1: (-1.5, 0.0),
-        2: (0.0, -1.5),
-        3: (0.0, 1.5),
-        4: (1.5, 0.0),
-        5: (3.0, 0.0),
-        6: (0.0, 0.0), # Central node
-    }
-
-    # 5. Extract edge labels for drawing
-    # The label will be formatted as "(capacity, weight)"
-    edge_labels = {
-        (u, v): f"({d['capacity']},{d['weight']})"
-        for u, v, d in G.edges(data=True)
-    }
-
-    # 6. Visualization settings
-    plt.figure(figsize=(10, 6))
-
-    # Draw the nodes
-    nx.draw_networkx_nodes(G, pos, node_size=1000, node_color="#89CFF0", edgecolors="black", linewidths=1.5)
-
-    # Draw the edges
-    nx.draw_networkx_edges(G, pos, arrowsize=20, edge_color="black", width=2)
-
-    # Draw node labels (the node numbers)
-    nx.draw_networkx_labels(G, pos, font_size=12, font_weight="bold")
-
-    # Draw edge labels (the capacity and weight)
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_color='black', label_pos=0.5, font_size=10)
-
-    plt.title("Directed Graph with Capacity and Weight Attributes (NetworkX)")
-    plt.axis('off') # Hide the axes
-    plt.show()
-
-    # Optional: Print graph information to verify
-    print("Nodes in the graph:", G.nodes)
-    print("Edges in the graph (u, v, data):")
-    for u, v, data in G.edges(data=True):
-        print(f"  {u} -> {v}: Capacity={data['capacity']}, Weight={data['weight']}")
-    return G
-
-def build_and_draw_graph2():
-    """
-    Initializes the new 4-node directed graph, adds edges with capacity and weight attributes,
-    and visualizes the graph using fixed positions for layout.
-    
-    Returns:
-        nx.DiGraph: The constructed graph G.
-    """
-    # 1. Initialize a directed graph
-    G = nx.DiGraph()
-
-    # 2. Define the edges with (capacity, weight) attributes from the new image
-    # Edges are defined as (source, target, {'capacity': c, 'weight': w})
-    edges_with_attributes = [
-        (0, 1, {'capacity': 2, 'weight': 1}),
-        (0, 2, {'capacity': 4, 'weight': 1}),
-        (1, 2, {'capacity': 3, 'weight': 1}),
-        (1, 3, {'capacity': 1, 'weight': 4}),
-        (2, 3, {'capacity': 6, 'weight': 1}),
-    ]
-
-    # 3. Add all edges and their attributes to the graph
-    G.add_edges_from(edges_with_attributes)
-
-    # 4. Define node positions to match the visual layout in the image
-    pos = {
-        0: (-2.0, 0.0), # Left
-        1: (0.0, 1.0),  # Top middle
-        2: (0.0, -1.0), # Bottom middle
-        3: (2.0, 0.0),  # Right
-    }
-
-    # 5. Extract edge labels for drawing
-    # The label will be formatted as "(capacity, weight)"
-    edge_labels = {
-        (u, v): f"({d['capacity']},{d['weight']})"
-        for u, v, d in G.edges(data=True)
-    }
-
-    # 6. Visualization settings
-    plt.figure(figsize=(8, 5))
-
-    # Draw the nodes
-    nx.draw_networkx_nodes(G, pos, node_size=1000, node_color="#89CFF0", edgecolors="black", linewidths=1.5)
-
-    # Draw the edges
-    nx.draw_networkx_edges(G, pos, arrowsize=20, edge_color="black", width=2)
-
-    # Draw node labels (the node numbers)
-    nx.draw_networkx_labels(G, pos, font_size=12, font_weight="bold")
-
-    # Draw edge labels (the capacity and weight)
-    # label_pos=0.3 is used for edge 1->2 to avoid overlap with node 6
-    edge_label_pos = {p: 0.5 for p in pos}
-    edge_label_pos[(1, 2)] = 0.3 # Move label for 1->2 closer to source 1
-    
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_color='black', label_pos=0.5, font_size=10)
-
-    plt.title("4-Node Directed Graph for Min-Cost Flow")
-    plt.axis('off') # Hide the axes
-    plt.show()
-
-    # Optional: Print graph information to verify
-    print("Nodes in the graph:", G.nodes)
-    print("Edges in the graph (u, v, data):")
-    for u, v, data in G.edges(data=True):
-        print(f"  {u} -> {v}: Capacity={data['capacity']}, Weight={data['weight']}")
-        
-    return G
-# residual graph is not connected- the nx func canot work properly !!!
-def build_and_draw_graph3():
-    """
-    Initializes the new node directed graph, adds edges with capacity and weight attributes,
-    and visualizes the graph using fixed positions for layout.
-    
-    Returns:
-        nx.DiGraph: The constructed graph G.
-    """
-    # 1. Initialize a directed graph
-    G = nx.DiGraph()
-
-    pos = {
-        0: (0, 200),
-        1: (150, 300),
-        2: (150, 200),
-        3: (150, 100),
-        4: (300, 250),
-        5: (300, 150),
-        6: (450, 200),
-    }
-
-    # 2. Define Edges with Attributes
-    # Format: (source, target, {'capacity': c, 'weight': w})
-    # The attributes are derived from the 'e <source_id> <target_id> <edge_id> <capacity> <weight>' lines.
-    edges_with_attributes = [
-        # (u, v, capacity, weight)
-        (0, 1, {'capacity': 8, 'weight': 2}),
-        (0, 2, {'capacity': 6, 'weight': 1}),
-        (1, 3, {'capacity': 3, 'weight': 5}),
-        (2, 1, {'capacity': 2, 'weight': 1}),
-        (2, 4, {'capacity': 5, 'weight': 2}),
-        (3, 5, {'capacity': 4, 'weight': 1}),
-        (3, 4, {'capacity': 1, 'weight': 3}),
-        (4, 6, {'capacity': 7, 'weight': 1}),
-        (5, 4, {'capacity': 2, 'weight': 1}),
-        (5, 6, {'capacity': 5, 'weight': 3}),
-        (2, 5, {'capacity': 4, 'weight': 1}),
-    ]
-    
-    # 3. Add all edges and their attributes to the graph
-    G.add_edges_from(edges_with_attributes)
-
-    # 5. Extract edge labels for drawing
-    # The label will be formatted as "(capacity, weight)"
-    edge_labels = {
-        (u, v): f"({d['capacity']},{d['weight']})"
-        for u, v, d in G.edges(data=True)
-    }
-
-    # 6. Visualization settings
-    plt.figure(figsize=(8, 5))
-
-    # Draw the nodes
-    nx.draw_networkx_nodes(G, pos, node_size=1000, node_color="#89CFF0", edgecolors="black", linewidths=1.5)
-
-    # Draw the edges
-    nx.draw_networkx_edges(G, pos, arrowsize=20, edge_color="black", width=2)
-
-    # Draw node labels (the node numbers)
-    nx.draw_networkx_labels(G, pos, font_size=12, font_weight="bold")
-
-    # Draw edge labels (the capacity and weight)
-    # label_pos=0.3 is used for edge 1->2 to avoid overlap with node 6
-    edge_label_pos = {p: 0.5 for p in pos}
-    edge_label_pos[(1, 2)] = 0.3 # Move label for 1->2 closer to source 1
-    
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels, font_color='black', label_pos=0.5, font_size=10)
-
-    plt.title("4-Node Directed Graph for Min-Cost Flow")
-    plt.axis('off') # Hide the axes
-    plt.show()
-
-    # Optional: Print graph information to verify
-    print("Nodes in the graph:", G.nodes)
-    print("Edges in the graph (u, v, data):")
-    for u, v, data in G.edges(data=True):
-        print(f"  {u} -> {v}: Capacity={data['capacity']}, Weight={data['weight']}")
-        
-    return G
-#same as 3
-def build_and_draw_graph4():
+def main(draw=False):
     """
-    Initializes the graph based on the user's input, with one modification 
-    to introduce a negative cycle (2 -> 1 -> 2) with cost -4.
-    
-    Returns:
-        nx.DiGraph: The constructed graph G.
+    Main entry point for the script. draw=True (--draw on the command line)
+    shows each sample graph with matplotlib, which is imported only then.
     """
-    G = nx.DiGraph()
-
-    # Node positions based on user input (n <x> <y> <node_id>)
-    pos = {
-        0: (0, 200),
-        1: (150, 300),
-        2: (150, 200),
-        3: (150, 100),
-        4: (300, 250),
-        5: (300, 150),
-        6: (450, 200),
-    }
-
-    # Edges based on user input (e <source> <target> <edge_id> <capacity> <weight>)
-    edges_with_attributes = [
-        # Original edges from user request
-        (0, 1, {'capacity': 8, 'weight': 2}),
-        (0, 2, {'capacity': 6, 'weight': 1}),
-        # (1, 3, {'capacity': 3, 'weight': 5}), # Use this original edge
-        (2, 1, {'capacity': 2, 'weight': 1}),
-        (2, 4, {'capacity': 5, 'weight': 2}),
-        (3, 5, {'capacity': 4, 'weight': 1}),
-        (3, 4, {'capacity': 1, 'weight': 3}),
-        (4, 6, {'capacity': 7, 'weight': 1}),
-        (5, 4, {'capacity': 2, 'weight': 1}),
-        (5, 6, {'capacity': 5, 'weight': 3}),
-        (2, 5, {'capacity': 4, 'weight': 1}),
-        (4, 1, {'capacity': 1, 'weight': 1}),
-    ]
-    
-    G.add_edges_from(edges_with_attributes)
-
-    # 5. Extract edge labels for drawing
-    edge_labels = {
-        (u, v): f"({d['capacity']},{d['weight']})"
-        for u, v, d in G.edges(data=True)
-    }
-
-    # 6. Visualization settings
-    plt.figure(figsize=(8, 6))
-
-    nx.draw_networkx_nodes(G, pos, node_size=1000, node_color="#FFD700", edgecolors="black", linewidths=1.5)
-    nx.draw_networkx_edges(G, pos, arrowsize=20, edge_color="black", width=2)
-    nx.draw_networkx_labels(G, pos, font_size=12, font_weight="bold")
-    
-    nx.draw_networkx_edge_labels(
-        G, pos, 
-        edge_labels=edge_labels, 
-        font_color='black', 
-        label_pos=0.5, 
-        font_size=10
+    # the sample graphs are demo code: library users importing
+    # cycle_cancelling never load them
+    from build_graph_funcs import (
+        build_and_draw_graph1,
+        build_and_draw_graph2,
+        build_and_draw_graph3,
+        build_and_draw_graph4,
     )
 
-    plt.title("Directed Graph 4 (Min-Cost Test with Negative Cycle: 2→1→2)")
-    plt.axis('off')
-    plt.show()
-        
-    return G
-
-
-def main():
-    """
-    Main entry point for the script.
-    """
-    
-    G1 = build_and_draw_graph1()
+    G1 = build_and_draw_graph1(draw=draw)
     # Define source (s) and sink (t) for the Min-Cost Max-Flow problem
     source_node = 0
     sink_node = 5
@@ -505,7 +258,9 @@ def main():
             source_node, 
             sink_node, 
             weight="weight", 
-            capacity="capacity"
+            capacity="capacity",
+            method="cycle",
+            debug=True
         )
         
         print("\n--- Results ---")
@@ -528,7 +283,7 @@ def main():
         print(f"Error details: {e}")
 
     
-    G2 = build_and_draw_graph2()
+    G2 = build_and_draw_graph2(draw=draw)
 
     # Define source (s) and sink (t) for the Min-Cost Max-Flow problem
     source_node = 0
@@ -543,7 +298,9 @@ def main():
             source_node, 
             sink_node, 
             weight="weight", 
-            capacity="capacity"
+            capacity="capacity",
+            method="cycle",
+            debug=True
         )
         
         print("\n--- Results ---")
@@ -566,7 +323,7 @@ def main():
         print(f"Error details: {e}")
 
 
-    G3 = build_and_draw_graph3()
+    G3 = build_and_draw_graph3(draw=draw)
     # Define source (s) and sink (t) for the Min-Cost Max-Flow problem
     source_node = 0
     sink_node = 6
@@ -580,7 +337,9 @@ def main():
             source_node, 
             sink_node, 
             weight="weight", 
-            capacity="capacity"
+            capacity="capacity",
+            method="cycle",
+            debug=True
         )
         
         print("\n--- Results ---")
@@ -602,7 +361,7 @@ def main():
         print(f"The Cycle-Cancelling algorithm failed, likely due to a dependency on a non-standard NetworkX function (nx.find_negative_cycle) or an issue in flow augmentation logic.")
         print(f"Error details: {e}")
     
-    G4 = build_and_draw_graph4()
+    G4 = build_and_draw_graph4(draw=draw)
 
     # Define source (s) and sink (t) for the Min-Cost Max-Flow problem
     source_node = 0
@@ -617,7 +376,9 @@ def main():
             source_node, 
             sink_node, 
             weight="weight", 
-            capacity="capacity"
+            capacity="capacity",
+            method="cycle",
+            debug=True
         )
         
         print("\n--- Results ---")
@@ -643,4 +404,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(draw="--draw" in sys.argv[1:])
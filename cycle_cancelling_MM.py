@@ -1,90 +1,96 @@
+from functools import partial
+
 import networkx as nx
-from copy import deepcopy
-import math
+from networkx.algorithms.flow import preflow_push
+import numpy as np
+
+from karp_core import karp_mu, karp_tables, karp_tables_incremental, karp_trace_cycle
+from residual_csr import HAVE_NUMBA
+from negative_cycle_funcs import compiled_find_negative_cycle
+from print_funcs import print_residual_graph_state as _print_residual_graph_state
+
+# The print helpers below return at once unless this is set, so a call left
+# in the main loop costs nothing
+DEBUG_PRINT = False
 
-def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
+def find_minimum_mean_negative_cycle(G, source=None, weight="weight", _cache=None):
     """
     Finds the minimum mean negative cycle using Karp's Algorithm.
     
-    1. Preprocesses MultiDiGraphs to simple DiGraphs (keeping min weight).
+    1. Takes DiGraphs or MultiDiGraphs (the DP keeps the cheapest parallel edge).
     2. Uses Dynamic Programming to find shortest paths of exact lengths.
     3. Applies Karp's formula to find the minimum mean value.
     4. Traces back through DP layers to recover the exact cycle nodes.
+
+    _cache: optional dict kept by the caller across calls on the same graph;
+    the node list and index map are built once and reused while the number
+    of nodes stays the same (cycle_cancelling only ever edits edges of R),
+    and so are the DP tables, recomputed only where edges changed.
     """
     
     # STEP 1: PREPROCESS -------------------------------------------------------
-    # Cycle-cancelling residual graphs are MultiDiGraphs
-    # Karp's DP requires a simple DiGraph where we use the cheapest edge
+    # No collapsing of parallel edges: the DP below runs over the flat edge
+    # list and keeps the cheapest edge into every node anyway, so a
+    # MultiDiGraph works as is (cycle_cancelling passes a plain DiGraph)
     if not isinstance(G, (nx.DiGraph, nx.MultiDiGraph)):
         raise TypeError("Karp requires a directed graph")
-    
-    if G.is_multigraph():
-        S = nx.DiGraph()
-        for u, v, data in G.edges(data=True):
-            w = data.get(weight, 0)
-            if S.has_edge(u, v):
-                # Save only one edge per direction between two nodes
-                # Choose the cheapest edge
-                if w < S[u][v][weight]:
-                    S[u][v][weight] = w
-            else:
-                S.add_edge(u, v, **{weight: w})
-        G = S
 
     # Initialization for dynamic programming
-    nodes = list(G.nodes())
+    if _cache is not None and "nodes" in _cache and len(_cache["nodes"]) == G.number_of_nodes():
+        nodes = _cache["nodes"]
+        idx = _cache["idx"]
+    else:
+        nodes = list(G.nodes())
+        idx = {v: i for i, v in enumerate(nodes)}   # Index mapping: node → int
+        if _cache is not None:
+            _cache.clear()
+            _cache["nodes"] = nodes
+            _cache["idx"] = idx
+
     n = len(nodes)
     if n == 0:
         raise nx.NetworkXError("Empty graph")
 
-    idx = {v: i for i, v in enumerate(nodes)}   # Index mapping: node → int
-    
-    # dp[k][v] = min cost of walk of length k ending at v
-    dp = [[math.inf] * n for _ in range(n + 1)]
-    # parent[k][v] = the node u that preceded v in a path of length k
-    # Compute walks of length up to n: any cycle must repeat within n nodes
-    parent = [[None] * n for _ in range(n + 1)]
-
-    # Virtual source: initialize all nodes at distance 0
-    # Allows detecting cycles anywhere in the graph
-    for v in range(n):
-        dp[0][v] = 0
+    # Edges as three flat arrays U → V with cost W over node indices
+    m = G.number_of_edges()
+    U = np.fromiter((idx[u] for u, _ in G.edges()), dtype=np.int32, count=m)
+    V = np.fromiter((idx[v] for _, v in G.edges()), dtype=np.int32, count=m)
+    W = np.fromiter((w for _, _, w in G.edges(data=weight)), dtype=np.float64, count=m)
 
     # STEP 2: DYNAMIC PROGRAMMING ----------------------------------------------
-    # Calculate shortest paths for every length k from 1 to n
-    for k in range(1, n + 1):
-        # Iterate over all directed edges (u → v)
-        for u, v, data in G.edges(data=True):
-            w = data[weight]
-            # Convert node labels to integer indices for DP table access
-            ui, vi = idx[u], idx[v]
-            # If extending the cheapest (k−1)-edge walk ending at u via edge u→v
-            # yields a cheaper k-edge walk ending at v, update the DP value
-            if dp[k - 1][ui] + w < dp[k][vi]:
-                dp[k][vi] = dp[k - 1][ui] + w
-                parent[k][vi] = u
+    # dp[k][v] = min cost of walk of length k ending at v (virtual source:
+    # every node at 0 for k = 0, so cycles anywhere are found);
+    # parent[k][v] = index of the node u that preceded v in that walk.
+    # Compiled (karp_core.karp_dp) when Numba is installed; with a _cache the
+    # tables of the previous call are patched where the edges changed.
+    # A layer equal to the previous one is a fixed point: no negative cycle,
+    # and the DP stops there instead of filling all n layers.
+    if _cache is not None:
+        dp, parent, layers = karp_tables_incremental(U, V, W, n, _cache)
+    else:
+        dp, parent, layers = karp_tables(U, V, W, n)
+    if layers < n:
+        raise nx.NetworkXError("No negative mean cycle found")
 
     # STEP 3: KARP'S MIN-MAX FORMULA -------------------------------------------
-    mu = math.inf       # Initialize the minimum mean cycle cost to infinity
-    v_star = None       # Will store a node that lies on the minimum mean cycle
-
-    # Iterate over every node to consider cycles ending at that node
-    for v in range(n):
-        if dp[n][v] == math.inf:
-            # Skip nodes that are unreachable in a walk of length n
-            continue
-        
-        # max_k [(dp[n][v] - dp[k][v]) / (n - k)]
-        max_avg = -math.inf
-        for k in range(n):
-            if dp[k][v] != math.inf:
-                avg = (dp[n][v] - dp[k][v]) / (n - k)
-                if avg > max_avg:
-                    max_avg = avg
-
-        if max_avg < mu:
-            mu = max_avg
-            v_star = v
+    # avg[k][v] = (dp[n][v] - dp[k][v]) / (n - k); layers with dp[k][v] = inf
+    # are skipped (−inf), nodes unreachable in n steps never win (+inf).
+    # With Numba this is karp_core.karp_mu, parallel over v.
+    if HAVE_NUMBA:
+        mu, v_star = karp_mu(dp, n)
+        if v_star < 0:
+            v_star = None
+    else:
+        with np.errstate(invalid="ignore"):
+            avg = (dp[n] - dp[:n]) / (n - np.arange(n))[:, None]
+        avg[np.isinf(dp[:n])] = -np.inf
+        max_avg = avg.max(axis=0)
+        max_avg[np.isinf(dp[n])] = np.inf
+
+        v_star = int(np.argmin(max_avg))   # a node on the minimum mean cycle
+        mu = max_avg[v_star]               # the minimum mean cycle cost
+        if mu == np.inf:
+            v_star = None
 
     # STEP 4: TERMINATION CHECK ------------------------------------------------
     # mu < 0 indicates a negative mean cycle exists
@@ -93,81 +99,31 @@ def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
         raise nx.NetworkXError("No negative mean cycle found")
 
     # STEP 5: ROBUST CYCLE RECONSTRUCTION --------------------------------------
-    # We trace the path back from the n-th layer to find the repeated nodes
-    curr = nodes[v_star]
-    path = []
-    for k in range(n, -1, -1):
-        path.append(curr)
-        curr = parent[k][idx[curr]]
-        if curr is None: break 
-
-    path.reverse()
-    
-    # Identify the actual cycle within the path (remove the "tail")
-    seen = {}
-    for i, node in enumerate(path):
-        if node in seen:
-            # Return cycle including the closing node for the backbone
-            return path[seen[node] : i + 1]
-        seen[node] = i
+    # We trace the path back from the n-th layer to the first repeated node
+    # and return the cycle including the closing node for the backbone
+    cycle = karp_trace_cycle(parent, v_star, n)
+    if len(cycle):
+        return [nodes[i] for i in cycle.tolist()]
 
     raise nx.NetworkXError("Failed to reconstruct cycle")
 
 def print_graph_with_flows(G, flow_dict, capacity_attr="capacity"):
+    if not DEBUG_PRINT:
+        return
     print("\n=== Graph with Flows ===")
     for u, v, data in G.edges(data=True):
         flow = flow_dict.get(u, {}).get(v, 0)
         cap = data.get(capacity_attr, "?")
         print(f"{u} -> {v} | flow = {flow} / capacity = {cap}")
 
-def print_residual_graph_state(R, cycle=None):
-    """
-    Prints the state of the residual graph to the console for a given iteration.
-    """
-    print(f"\n========================================================")
-    print(f"========================================================")
-    
-    # 1. Print cycle information if found
-    if cycle:
-        cycle_edges = []
-        cycle_cost = 0
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            # Use .get for safety, although the cycle should only contain existing edges
-            w = R[u][v].get("weight", 0)
-            cycle_cost += w
-            cycle_edges.append(f"({u} -> {v})")
-            
-        print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
-    else:
-        print("No Negative Cycle Found. Termination condition met.")
-
-    # 2. Print all residual edges
-    print("\nResidual Edges (u -> v: Cap, Cost):")
-    edges_to_print = []
-    for u, v, data in R.edges(data=True):
-        cap = data["capacity"]
-        weight = data["weight"]
-        # Highlight cycle edges in the printout
-        if cycle:
-            is_cycle_edge = False
-            for i in range(len(cycle) - 1):
-                if (u, v) == (cycle[i], cycle[i+1]):
-                    is_cycle_edge = True
-                    break
-            
-            label = f"   * {u} -> {v}: ({cap}, {weight})" if is_cycle_edge else f"     {u} -> {v}: ({cap}, {weight})"
-        else:
-            label = f"     {u} -> {v}: ({cap}, {weight})"
-            
-        edges_to_print.append(label)
-        
-    for label in sorted(edges_to_print):
-         print(label)
-    print(f"========================================================\n")
+def print_residual_graph_state(R, cycle=None, sort=True, meta=None):
+    if not DEBUG_PRINT:
+        return
+    _print_residual_graph_state(R, cycle, sort=sort, meta=meta)
+
 
-def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None):
+def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None,
+                     detection_func=compiled_find_negative_cycle):
     """
     Cycle-Cancelling algorithm for Minimum-Cost Flow.
     
@@ -177,6 +133,13 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         t : target node
         weight : edge attribute for cost
         capacity : edge attribute for capacity
+        flow_func : networkx max-flow routine for the initial flow
+            (default: preflow_push)
+        negative_cycle_func : finder used as the optimality certificate
+            (default: Karp's minimum mean cycle)
+        detection_func : cheap finder tried first on every iteration
+            (default: early-exit Bellman–Ford); None cancels only the
+            cycles negative_cycle_func returns
     
     Returns:
         (flow_dict, min_cost)
@@ -197,97 +160,136 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     if t not in G.nodes:
         raise ValueError("Target node does not exist in graph.")
 
-    for u, v, data in G.edges(data=True):
-        if capacity not in data:
-            raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
-        if data[capacity] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative capacity.")
-
-        if weight not in data:
-            raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
-        #the algorithm can run on negative too - think of delete it
-        if data[weight] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative weight ({data[weight]}).")
+    # one dict lookup per attribute; None marks a missing one. The raw
+    # adjacency dicts skip the tuple building of G.edges(data=True).
+    # The weights are kept in G's edge order for the final cost (step 5).
+    edge_weights = []
+    for u, nbrs in G._adj.items():
+        for v, data in nbrs.items():
+            c = data.get(capacity)
+            w = data.get(weight)
+
+            if c is None:
+                raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
+            if c < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative capacity.")
+
+            if w is None:
+                raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
+            #the algorithm can run on negative too - think of delete it
+            if w < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative weight ({w}).")
+            edge_weights.append(w)
         
     if negative_cycle_func is None:
-        negative_cycle_func = default_negative_cycle_func
+        # R keeps its nodes for the whole run: let Karp reuse its index maps
+        negative_cycle_func = partial(default_negative_cycle_func, _cache={})
     
     if not callable (negative_cycle_func):
         raise nx.NetworkXError("finding negative cycle func has to be callable.")
 
+    if detection_func is not None and not callable(detection_func):
+        raise nx.NetworkXError("detection func has to be callable.")
+
     # --------------------------------------------------------
     # 2. INITIAL MAX-FLOW (IGNORE COSTS)
     # --------------------------------------------------------
     
-    # We temporarily build a capacity-only graph
-    G_cap = nx.DiGraph()
-    for u, v, data in G.edges(data=True):
-        G_cap.add_edge(u, v, capacity=data[capacity])
-
-    max_flow_return = nx.maximum_flow(G_cap, s, t, flow_func=None)  # flow_dict is a nested dict
+    # max-flow only reads the capacity attribute, so run it on G itself
+    max_flow_return = nx.maximum_flow(G, s, t, capacity=capacity, flow_func=flow_func or preflow_push)  # flow_dict is a nested dict
     flow_dict = max_flow_return[1]
-
-    
-
-    for u, v in G_cap.edges():
-        # If node u has no outgoing flow dict, create one
-        if u not in flow_dict:
-            flow_dict[u] = {}
-
-        # If edge (u, v) not assigned by max-flow, its flow is 0
-        if v not in flow_dict[u]:
-            flow_dict[u][v] = 0
+    # nx builds the flow dict from G itself (build_flow_dict): every node
+    # and every edge of G already has an entry, 0 where no flow was sent,
+    # so no fill-in pass is needed
     
 
     # --------------------------------------------------------
     # 3. BUILD INITIAL RESIDUAL GRAPH
     # --------------------------------------------------------
     
+    # Residual arc metadata lives next to R in one flat dict,
+    # R_meta[(u, v)] = (weight, capacity, kind) with kind FWD or BWD:
+    # one tuple-key lookup instead of R[u][v]["..."]. R itself only carries
+    # the weight, which is all the negative-cycle finders read.
+    FWD, BWD = 1, 0
+
+    def add_residual_arcs(R, meta, u, v, data, f):
+        """Residual arcs of the original edge (u, v) carrying flow f."""
+        cap = data[capacity]
+        w = data[weight]
+
+        # Forward residual edge: can push (cap - f) more flow at cost 'w'
+        # for negative cycle, we need only the bwd edge, otherwise we work with an edge without flow
+        if f < cap:
+            arc = meta.get((u, v))
+            if arc is not None:
+                if arc[2] == BWD:
+                    return
+            else:
+                R.add_edge(u, v, weight=w)
+                meta[(u, v)] = (w, cap - f, FWD)
+
+        # Backward residual edge: can push 'f' back at cost '-w'
+        if f > 0:
+            arc = meta.get((v, u))
+            if arc is not None and arc[2] == FWD:
+                R.remove_edge(v, u)
+            R.add_edge(v, u, weight=-w)
+            meta[(v, u)] = (-w, f, BWD)
+
     def build_residual(G, flow):
         # We use MultiDiGraph because u->v might have a forward residual edge 
         # AND a backward residual edge from the opposite original edge v->u.
         R = nx.DiGraph()
+        meta = {}
         for u, v, data in G.edges(data=True):
-            cap = data[capacity]
-            w = data[weight]
-            f = flow.get(u, {}).get(v, 0)
-
-            # Forward residual edge: can push (cap - f) more flow at cost 'w'
-            # for negative cycle, we need only the bwd edge, otherwise we work with an edge without flow
-            if f < cap:
-                if R.has_edge(u, v):
-                    if R[u][v]["type"] == "bwd":
-                        continue
-                else:
-                    R.add_edge(u, v, weight=w, capacity=cap - f, type='fwd')
-            
-            # Backward residual edge: can push 'f' back at cost '-w'
-            if f > 0:
-                if R.has_edge(v, u):
-                    if R[v][u]["type"] == "fwd":
-                        R.remove_edge(v, u)
-                R.add_edge(v, u, weight=-w, capacity=f, type='bwd')
-                
-        return R
+            add_residual_arcs(R, meta, u, v, data, flow.get(u, {}).get(v, 0))
+        return R, meta
+
+    # position of each node in G's edge order, so a pair can be replayed
+    # in the same order build_residual sees it
+    node_pos = {v: i for i, v in enumerate(G)}
+
+    def refresh_residual_pair(R, meta, a, b, flow):
+        """
+        Rebuild the residual arcs between a and b after their flow changed.
+        Only the original edges (a, b) and (b, a) touch R[a][b] / R[b][a],
+        so replaying just those two gives the same arcs as build_residual.
+        """
+        if meta.pop((a, b), None) is not None:
+            R.remove_edge(a, b)
+        if meta.pop((b, a), None) is not None:
+            R.remove_edge(b, a)
+
+        if node_pos[a] > node_pos[b]:
+            a, b = b, a
+        for u, v in ((a, b), (b, a)):
+            if v in G._adj[u]:
+                add_residual_arcs(R, meta, u, v, G._adj[u][v], flow[u][v])
 
     # --------------------------------------------------------
     # Helper: increase flow on edges of a cycle
     # --------------------------------------------------------
 
+    # original arcs as a plain set: a tuple lookup instead of G.has_edge
+    orig_arcs = frozenset(G.edges())
+
     def augment_cycle(flow, cycle, bottleneck):
         """Increase flow along cycle edges by bottleneck."""
+        # flow already has an entry for every edge of G (see step 2), so it
+        # is updated by plain subscripts; each residual arc is looked up once
         for i in range(len(cycle)-1):
             u = cycle[i]
             v = cycle[i+1]
+            arc = R_meta.get((u, v))
+            kind = arc[2] if arc is not None else None
 
-            if G.has_edge(u, v) and R.has_edge(u,v) and R[u][v]["type"] == "fwd":  
+            if kind == FWD and (u, v) in orig_arcs:  
                 # forward edge (u→v)
-                flow.setdefault(u, {}).setdefault(v, 0)
                 flow[u][v] += bottleneck
 
-            elif G.has_edge(v, u) and R.has_edge(u,v) and R[u][v]["type"] == "bwd":  
+            elif kind == BWD and (v, u) in orig_arcs:  
                 # backward edge (v→u)
-                flow.setdefault(v, {}).setdefault(u, 0)
                 flow[v][u] -= bottleneck  # reduce forward flow
 
             else:
@@ -297,13 +299,26 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     # 4. MAIN LOOP — CANCEL NEGATIVE CYCLES
     # --------------------------------------------------------
 
+    # R is built once; after each augmentation only the arcs along the
+    # cycle are refreshed (O(|cycle|) instead of O(m) per iteration)
+    R, R_meta = build_residual(G, flow_dict)
+
     while True:
 
-        R = build_residual(G, flow_dict)
+        # Bellman–Ford stops at the first relaxation in round n, so most
+        # cycles come cheap; Karp's O(nm) DP only runs once detection comes
+        # up empty, to certify that no negative cycle is left
+        cycle = None
+        if detection_func is not None:
+            try:
+                cycle = detection_func(R, s, weight="weight")
+            except nx.NetworkXError:
+                cycle = None
 
         try:
             # Try to find a negative cycle in graph R
-            cycle = negative_cycle_func(R, s, weight="weight")
+            if not cycle:
+                cycle = negative_cycle_func(R, s, weight="weight")
             """
             if cycle:
                 cycle_edges = []
@@ -320,7 +335,7 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
                 print(f"the cycle cost: {cycle_cost}")
                 if cycle_cost >= 0 :
                     continue
-            print_residual_graph_state(R, cycle)
+            print_residual_graph_state(R, cycle, meta=R_meta)
             """
         except nx.NetworkXError:
                 cycle = None
@@ -329,26 +344,20 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
             break  # terminate
         
         # ---- your bottleneck & augment logic, now "per SCC" ----
-        bottleneck = float("inf")
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            cap = R[u][v]["capacity"]
-            if cap < bottleneck:
-                bottleneck = cap
+        bottleneck = min(R_meta[(u, v)][1] for u, v in zip(cycle, cycle[1:]))
         if bottleneck <= 0:
             raise RuntimeError("Residual bottleneck is non-positive (should not happen).")
 
         augment_cycle(flow_dict, cycle, bottleneck)
+        for u, v in zip(cycle, cycle[1:]):
+            refresh_residual_pair(R, R_meta, u, v, flow_dict)
 
     # --------------------------------------------------------
     # 5. COMPUTE FINAL MINIMUM COST
     # --------------------------------------------------------
-    min_cost = 0
-    for u, nbrs in flow_dict.items():
-        for v, f in nbrs.items():
-            if f > 0:  # only forward flows
-                min_cost += f * G[u][v][weight]
+    # flow_dict holds every edge of G (see step 2): one dot product
+    flows = np.array([flow_dict[u][v] for u, v in G.edges()])
+    min_cost = np.dot(flows, np.array(edge_weights)).item()
 
     return flow_dict, min_cost
 
@@ -1,6 +1,5 @@
-from copy import deepcopy
 import networkx as nx
-import random
+import numpy as np
 from typing import Tuple, Optional
 
 from build_graph_funcs import (
@@ -84,16 +83,18 @@ def run_experiment_for_graph(build_fn, name, s, t):
     """
 
     # 1. Max flow (on a copy, just in case)
-    f_max, _ = run_and_print_max_flow(deepcopy(G_base), name, s, t)
+    # G.copy() gives every edge its own attribute dict, which is all the
+    # runs below mutate; no need for the deepcopy object-graph walk
+    f_max, _ = run_and_print_max_flow(G_base.copy(), name, s, t)
 
     # 2. NetworkX min-cost flow (on a fresh copy)
-    G_nx = deepcopy(G_base)
+    G_nx = G_base.copy()
     flow_nx, cost_nx = run_and_print_min_cost_flow(G_nx, name, s, t, f_max)
 
     # 3. Cycle-cancelling (on a fresh copy)
     print(f"\n{name} [CycleCancelling]: running cycle-cancelling from {s} to {t}")
     try:
-        G_cc = deepcopy(G_base)
+        G_cc = G_base.copy()
         flow_cc, cost_cc = cycle_cancelling(
             G_cc,
             s,
@@ -141,7 +142,8 @@ def build_random_directed_graph(
     Generate a random directed graph and assign random 'capacity' and 'weight'
     to every edge.
 
-    - Topology: nx.gnp_random_graph(..., directed=True)
+    - Topology: each ordered pair (u, v) is an edge with probability density
+      (G(n, p), sampled as one NumPy adjacency matrix)
     - Attributes:
         edge['capacity'] in [capacity_range[0], capacity_range[1]]
         edge['weight']   in [weight_range[0], weight_range[1]]
@@ -168,25 +170,26 @@ def build_random_directed_graph(
     if source == target:
         raise ValueError("source and target must be different nodes")
 
-    rng = random.Random(seed)
+    rng = np.random.default_rng(seed)
 
-    # 1) Create directed topology
-    G = nx.gnp_random_graph(num_nodes, density, directed=True, seed=seed)
-    G = nx.DiGraph(G)  # ensure simple DiGraph (no parallel edges)
-
-    # Optionally remove self-loops
+    # 1) Create directed topology: one (n x n) Bernoulli draw is the
+    #    adjacency matrix, and the graph is built from its nonzeros in one go
+    A = rng.random((num_nodes, num_nodes)) < density
     if not allow_self_loops:
-        G.remove_edges_from(nx.selfloop_edges(G))
+        np.fill_diagonal(A, False)
+    us, vs = np.nonzero(A)
+
+    G = nx.DiGraph()
+    G.add_nodes_from(range(num_nodes))
+    G.add_edges_from(zip(us.tolist(), vs.tolist()))
 
 
     # 2) Ensure at least one path from source to target (optional but useful for flow tests)
     if ensure_path:
         if not nx.has_path(G, source, target):
             # Add a simple chain: source -> ... -> target using random intermediate nodes
-            nodes = list(range(num_nodes))
-            nodes.remove(source)
-            nodes.remove(target)
-            rng.shuffle(nodes)
+            nodes = [v for v in range(num_nodes) if v != source and v != target]
+            nodes = [nodes[i] for i in rng.permutation(len(nodes))]
             chain = [source] + nodes[: max(0, min(len(nodes), 3))] + [target]  # short chain
             for u, v in zip(chain, chain[1:]):
                 G.add_edge(u, v)
@@ -196,10 +199,14 @@ def build_random_directed_graph(
     """
 
 
-    # 4) Assign random capacity/weight to EVERY edge
-    for u, v in G.edges():
-        G[u][v]["capacity"] = rng.randint(c_lo, c_hi)
-        G[u][v]["weight"] = rng.randint(w_lo, w_hi)
+    # 4) Assign random capacity/weight to EVERY edge (drawn as two vectors)
+    m = G.number_of_edges()
+    caps = rng.integers(c_lo, c_hi + 1, size=m).tolist()
+    wts = rng.integers(w_lo, w_hi + 1, size=m).tolist()
+    for (u, v), c, w in zip(G.edges(), caps, wts):
+        data = G[u][v]
+        data["capacity"] = c
+        data["weight"] = w
 
     return G
 
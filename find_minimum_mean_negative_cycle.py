@@ -1,34 +1,25 @@
 import math
+from array import array
 import networkx as nx
-from copy import deepcopy
+from networkx.algorithms.flow import preflow_push
+import numpy as np
+from print_funcs import print_residual_graph_state
 
 
 def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
     """
     Finds the minimum mean negative cycle using Karp's Algorithm.
     
-    1. Preprocesses MultiDiGraphs to simple DiGraphs (keeping min weight).
+    1. Takes DiGraphs or MultiDiGraphs (the DP keeps the cheapest parallel edge).
     2. Uses Dynamic Programming to find shortest paths of exact lengths.
     3. Applies Karp's formula to find the minimum mean value.
     4. Traces back through DP layers to recover the exact cycle nodes.
     """
     
     # STEP 1: PREPROCESS -------------------------------------------------------
-    # Cycle-cancelling residual graphs are MultiDiGraphs
-    # Karp's DP requires a simple DiGraph where we use the cheapest edge
-    print("karp bitch")
-    if G.is_multigraph():
-        S = nx.DiGraph()
-        for u, v, data in G.edges(data=True):
-            w = data.get(weight, 0)
-            if S.has_edge(u, v):
-                # Save only one edge per direction between two nodes
-                # Choose the cheapest edge
-                if w < S[u][v][weight]:
-                    S[u][v][weight] = w
-            else:
-                S.add_edge(u, v, **{weight: w})
-        G = S
+    # No collapsing of parallel edges: the DP below runs over the flat edge
+    # list and keeps the cheapest edge into every node anyway, so a
+    # MultiDiGraph works as is (cycle_cancelling passes a plain DiGraph)
 
     # Initialization for dynamic programming
     nodes = list(G.nodes())
@@ -37,12 +28,21 @@ def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
         raise nx.NetworkXError("Empty graph")
 
     idx = {v: i for i, v in enumerate(nodes)}   # Index mapping: node → int
-    
+
+    # Edges as three parallel arrays U → V with cost W: the labels and the
+    # weight lookup are resolved once here instead of in every layer below
+    edges_list = list(G.edges(data=weight))
+    m = len(edges_list)
+    U = array('i', [idx[u] for u, _, _ in edges_list])
+    V = array('i', [idx[v] for _, v, _ in edges_list])
+    W = array('d', [w for _, _, w in edges_list])
+
     # dp[k][v] = min cost of walk of length k ending at v
     dp = [[math.inf] * n for _ in range(n + 1)]
-    # parent[k][v] = the node u that preceded v in a path of length k
+    # parent[k][v] = index of the node u that preceded v in a path of length k
+    # (-1: none), one flat int buffer per layer instead of boxed objects
     # Compute walks of length up to n: any cycle must repeat within n nodes
-    parent = [[None] * n for _ in range(n + 1)]
+    parent = [array('i', [-1]) * n for _ in range(n + 1)]
 
     # Virtual source: initialize all nodes at distance 0
     # Allows detecting cycles anywhere in the graph
@@ -52,38 +52,39 @@ def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
     # STEP 2: DYNAMIC PROGRAMMING ----------------------------------------------
     # Calculate shortest paths for every length k from 1 to n
     for k in range(1, n + 1):
+        prev, cur, par = dp[k - 1], dp[k], parent[k]
         # Iterate over all directed edges (u → v)
-        for u, v, data in G.edges(data=True):
-            w = data[weight]
-            # Convert node labels to integer indices for DP table access
-            ui, vi = idx[u], idx[v]
+        for i in range(m):
+            ui = U[i]
+            vi = V[i]
             # If extending the cheapest (k−1)-edge walk ending at u via edge u→v
             # yields a cheaper k-edge walk ending at v, update the DP value
-            if dp[k - 1][ui] + w < dp[k][vi]:
-                dp[k][vi] = dp[k - 1][ui] + w
-                parent[k][vi] = u
+            val = prev[ui] + W[i]
+            if val < cur[vi]:
+                cur[vi] = val
+                par[vi] = ui
 
-    # STEP 3: KARP'S MIN-MAX FORMULA -------------------------------------------
-    mu = math.inf       # Initialize the minimum mean cycle cost to infinity
-    v_star = None       # Will store a node that lies on the minimum mean cycle
+        # dp[k] depends on dp[k-1] only: an unchanged layer is a fixed point,
+        # i.e. a feasible potential, so there is no negative cycle at all
+        if cur == prev:
+            raise nx.NetworkXError("No negative mean cycle found")
 
-    # Iterate over every node to consider cycles ending at that node
-    for v in range(n):
-        if dp[n][v] == math.inf:
-            # Skip nodes that are unreachable in a walk of length n
-            continue
-        
-        # max_k [(dp[n][v] - dp[k][v]) / (n - k)]
-        max_avg = -math.inf
-        for k in range(n):
-            if dp[k][v] != math.inf:
-                avg = (dp[n][v] - dp[k][v]) / (n - k)
-                if avg > max_avg:
-                    max_avg = avg
-
-        if max_avg < mu:
-            mu = max_avg
-            v_star = v
+    # STEP 3: KARP'S MIN-MAX FORMULA -------------------------------------------
+    # max_k [(dp[n][v] - dp[k][v]) / (n - k)] for every v at once, then the
+    # minimum over v. Layers with dp[k][v] = inf are skipped (−inf), nodes
+    # unreachable in a walk of length n never win (+inf)
+    D = np.array(dp)
+    denom = (n - np.arange(n)).astype(np.float64)[:, None]
+    mask = np.isfinite(D[:n])
+    with np.errstate(invalid="ignore"):
+        avg = np.where(mask, (D[n][None, :] - D[:n]) / denom, -np.inf)
+    max_per_v = avg.max(axis=0)
+    max_per_v[~np.isfinite(D[n])] = np.inf
+
+    v_star = int(max_per_v.argmin())   # a node on the minimum mean cycle
+    mu = max_per_v[v_star]             # the minimum mean cycle cost
+    if mu == math.inf:
+        v_star = None
 
     # STEP 4: TERMINATION CHECK ------------------------------------------------
     # mu < 0 indicates a negative mean cycle exists
@@ -93,22 +94,25 @@ def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
 
     # STEP 5: ROBUST CYCLE RECONSTRUCTION --------------------------------------
     # We trace the path back from the n-th layer to find the repeated nodes
-    curr = nodes[v_star]
-    path = []
+    # (the path holds node indices; labels are looked up for the result only)
+    # path[k] is the node at layer k, filled backwards in place (no reverse)
+    curr = v_star
+    path = [0] * (n + 1)
     for k in range(n, -1, -1):
-        path.append(curr)
-        curr = parent[k][idx[curr]]
-        if curr is None: break 
-
-    path.reverse()
+        path[k] = curr
+        curr = parent[k][curr]
+        if curr < 0:
+            path = path[k:]
+            break
     
-    # Identify the actual cycle within the path (remove the "tail")
-    seen = {}
-    for i, node in enumerate(path):
-        if node in seen:
+    # Identify the actual cycle within the path (remove the "tail");
+    # first_seen[i] = position of node index i in path, -1 if not yet seen
+    first_seen = array('i', [-1]) * n
+    for i, ci in enumerate(path):
+        if first_seen[ci] >= 0:
             # Return cycle including the closing node for the backbone
-            return path[seen[node] : i + 1]
-        seen[node] = i
+            return [nodes[c] for c in path[first_seen[ci] : i + 1]]
+        first_seen[ci] = i
 
     raise nx.NetworkXError("Failed to reconstruct cycle")
 
@@ -123,54 +127,8 @@ def print_graph_with_flows(G, flow_dict, capacity_attr="capacity"):
         cap = data.get(capacity_attr, "?")
         print(f"{u} -> {v} | flow = {flow} / capacity = {cap}")
 
-def print_residual_graph_state(R, cycle=None):
-    """
-    Prints the state of the residual graph to the console for a given iteration.
-    """
-    print(f"\n========================================================")
-    print(f"========================================================")
-    
-    # 1. Print cycle information if found
-    if cycle:
-        cycle_edges = []
-        cycle_cost = 0
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            # Use .get for safety, although the cycle should only contain existing edges
-            weight = R[u][v].get("weight", 0)
-            cycle_cost += weight
-            cycle_edges.append(f"({u} -> {v})")
-            
-        print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
-    else:
-        print("No Negative Cycle Found. Termination condition met.")
-
-    # 2. Print all residual edges
-    print("\nResidual Edges (u -> v: Cap, Cost):")
-    edges_to_print = []
-    for u, v, data in R.edges(data=True):
-        cap = data["capacity"]
-        weight = data["weight"]
-        # Highlight cycle edges in the printout
-        if cycle:
-            is_cycle_edge = False
-            for i in range(len(cycle) - 1):
-                if (u, v) == (cycle[i], cycle[i+1]):
-                    is_cycle_edge = True
-                    break
-            
-            label = f"   * {u} -> {v}: ({cap}, {weight})" if is_cycle_edge else f"     {u} -> {v}: ({cap}, {weight})"
-        else:
-            label = f"     {u} -> {v}: ({cap}, {weight})"
-            
-        edges_to_print.append(label)
-        
-    for label in sorted(edges_to_print):
-         print(label)
-    print(f"========================================================\n")
-
-def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None):
+def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None,
+                     debug=False):
     """
     Cycle-Cancelling algorithm for Minimum-Cost Flow.
     
@@ -180,6 +138,9 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         t : target node
         weight : edge attribute for cost
         capacity : edge attribute for capacity
+        flow_func : networkx max-flow routine for the initial flow
+            (default: preflow_push)
+        debug : print the flows / residual graph on every iteration
     
     Returns:
         (flow_dict, min_cost)
@@ -199,17 +160,23 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     if t not in G.nodes:
         raise ValueError("Target node does not exist in graph.")
 
-    for u, v, data in G.edges(data=True):
-        if capacity not in data:
-            raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
-        if data[capacity] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative capacity.")
-
-        if weight not in data:
-            raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
-        #the algorithm can run on negative too - think of delete it
-        if data[weight] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative weight ({data[weight]}).")
+    # one dict lookup per attribute; None marks a missing one. The raw
+    # adjacency dicts skip the tuple building of G.edges(data=True).
+    for u, nbrs in G._adj.items():
+        for v, data in nbrs.items():
+            c = data.get(capacity)
+            w = data.get(weight)
+
+            if c is None:
+                raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
+            if c < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative capacity.")
+
+            if w is None:
+                raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
+            #the algorithm can run on negative too - think of delete it
+            if w < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative weight ({w}).")
         
     if negative_cycle_func is None:
         negative_cycle_func = default_negative_cycle_func
@@ -221,17 +188,13 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     # 2. INITIAL MAX-FLOW (IGNORE COSTS)
     # --------------------------------------------------------
     
-    # We temporarily build a capacity-only graph
-    G_cap = nx.DiGraph()
-    for u, v, data in G.edges(data=True):
-        G_cap.add_edge(u, v, capacity=data[capacity])
-
-    max_flow_return = nx.maximum_flow(G_cap, s, t, flow_func=None)  # flow_dict is a nested dict
+    # max-flow only reads the capacity attribute, so run it on G itself
+    max_flow_return = nx.maximum_flow(G, s, t, capacity=capacity, flow_func=flow_func or preflow_push)  # flow_dict is a nested dict
     flow_dict = max_flow_return[1]
 
     
 
-    for u, v in G_cap.edges():
+    for u, v in G.edges():
         # If node u has no outgoing flow dict, create one
         if u not in flow_dict:
             flow_dict[u] = {}
@@ -240,7 +203,8 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         if v not in flow_dict[u]:
             flow_dict[u][v] = 0
 
-    print_graph_with_flows(G_cap, flow_dict)
+    if debug:
+        print_graph_with_flows(G, flow_dict, capacity_attr=capacity)
     
 
     # --------------------------------------------------------
@@ -271,20 +235,22 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     # Helper: increase flow on edges of a cycle
     # --------------------------------------------------------
 
+    # original arcs as a plain set: a tuple lookup instead of G.has_edge
+    orig_arcs = frozenset(G.edges())
+
     def augment_cycle(flow, cycle, bottleneck):
         """Increase flow along cycle edges by bottleneck."""
+        # flow already has an entry for every edge of G (filled in step 2)
         for i in range(len(cycle)-1):
             u = cycle[i]
             v = cycle[i+1]
 
-            if G.has_edge(u, v):  
+            if (u, v) in orig_arcs:  
                 # forward edge (u→v)
-                flow.setdefault(u, {}).setdefault(v, 0)
                 flow[u][v] += bottleneck
 
-            elif G.has_edge(v, u):  
+            elif (v, u) in orig_arcs:  
                 # backward edge (v→u)
-                flow.setdefault(v, {}).setdefault(u, 0)
                 flow[v][u] -= bottleneck  # reduce forward flow
 
             else:
@@ -296,11 +262,13 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
 
     while True:
 
-        print_graph_with_flows(G, flow_dict)
+        if debug:
+            print_graph_with_flows(G, flow_dict)
 
         R = build_residual(G, flow_dict)
 
-        print_residual_graph_state(R, None)
+        if debug:
+            print_residual_graph_state(R, None)
 
         cycle_found = False  # will flip to True if we find & cancel a negative cycle
 
@@ -313,14 +281,15 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
                     continue
 
             # Induced subgraph on this SCC
-            subR = R.subgraph(comp).copy()
+            subR = R.subgraph(comp)   # read-only view, the finders never mutate it
             start = next(iter(comp))
 
             try:
                 # Try to find a negative cycle inside this SCC
                 cycle = negative_cycle_func(subR, start, weight="weight")
 
-                print_residual_graph_state(R, cycle)
+                if debug:
+                    print_residual_graph_state(R, cycle)
             except nx.NetworkXError:
                 # No negative cycle reachable from this start node in this SCC
                 continue
@@ -330,14 +299,11 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
             #print_residual_graph_state(R, cycle)
 
             # ---- your bottleneck & augment logic, now "per SCC" ----
-            bottleneck = float("inf")
-            for i in range(len(cycle) - 1):
-                u = cycle[i]
-                v = cycle[i + 1]
-                cap = R[u][v]["capacity"]
-                if cap < bottleneck:
-                    bottleneck = cap
-            print(f"the Bottleneck is : {bottleneck}")
+            # R._succ is the raw adjacency dict: one lookup per step, no view layer
+            succ = R._succ
+            bottleneck = min(succ[u][v]["capacity"] for u, v in zip(cycle, cycle[1:]))
+            if debug:
+                print(f"the Bottleneck is : {bottleneck}")
             if bottleneck <= 0:
                 raise RuntimeError("Residual bottleneck is non-positive (should not happen).")
 
@@ -359,11 +325,10 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     # 5. COMPUTE FINAL MINIMUM COST
     # --------------------------------------------------------
 
-    min_cost = 0
-    for u, nbrs in flow_dict.items():
-        for v, f in nbrs.items():
-            if f > 0:  # only forward flows
-                min_cost += f * G[u][v][weight]
+    # flow_dict holds every edge of G (filled in step 2): one dot product
+    flows = np.array([flow_dict[u][v] for u, v in G.edges()])
+    costs = np.array([w for _, _, w in G.edges(data=weight)])
+    min_cost = np.dot(flows, costs).item()
 
     return flow_dict, min_cost
 
@@ -0,0 +1,264 @@
+import math
+
+import numpy as np
+
+from residual_csr import HAVE_NUMBA, njit, prange
+
+INF = math.inf
+
+# ------------------------------------------------------------
+# Karp's minimum mean cycle on flat edge arrays
+# ------------------------------------------------------------
+# Edges are three arrays U -> V with cost W over node indices 0..n-1.
+# dp[k][v] = min cost of a walk of exactly k edges ending at v, starting
+# anywhere (virtual source, dp[0] = 0); parent[k][v] = node before v on it.
+
+
+@njit(cache=True, boundscheck=False)
+def karp_dp(U, V, W, n):
+    """
+    Karp's DP tables (dp, parent) of shape (n+1, n), compiled.
+    The edges are grouped by tail (CSR) once; layer k then only walks the
+    out-edges of nodes with a finite dp[k-1], so nodes no (k-1)-edge walk
+    reaches cost nothing.
+
+    Also returns the number of layers filled: if a layer comes out equal
+    to the one before, every later layer would too (dp[k] is a function
+    of dp[k-1] only), so dp is a feasible potential and there is no
+    negative cycle; the DP stops there and returns that k < n.
+    """
+    dp = np.empty((n + 1, n))
+    parent = np.empty((n + 1, n), np.int32)
+    dp[:, :] = INF
+    parent[:, :] = -1
+    dp[0, :] = 0.0
+
+    # CSR by tail: the out-edges of u are head[indptr[u]:indptr[u+1]]
+    m = len(U)
+    order = np.argsort(U, kind="mergesort")
+    indptr = np.zeros(n + 1, np.int64)
+    for e in range(m):
+        indptr[U[e] + 1] += 1
+    for u in range(n):
+        indptr[u + 1] += indptr[u]
+    head = V[order]
+    w = W[order]
+
+    for k in range(1, n + 1):
+        prev = dp[k - 1]
+        cur = dp[k]
+        for u in range(n):
+            d0 = prev[u]
+            if d0 == INF:
+                continue
+            for i in range(indptr[u], indptr[u + 1]):
+                d = d0 + w[i]
+                v = head[i]
+                if d < cur[v]:
+                    cur[v] = d
+                    parent[k, v] = u
+
+        same = True
+        for v in range(n):
+            if cur[v] != prev[v]:
+                same = False
+                break
+        if same:
+            return dp, parent, k
+
+    return dp, parent, n
+
+
+def karp_dp_vectorized(U, V, W, n):
+    """
+    Same tables (and early stop) as karp_dp with NumPy ufuncs only (used
+    without Numba): edges are grouped by head once, then every layer is one
+    gather plus np.minimum.reduceat over the per-head slices.
+    """
+    m = len(U)
+    order = np.argsort(V, kind="stable")
+    U, V, W = U[order], V[order], W[order]
+    starts = np.flatnonzero(np.r_[True, V[1:] != V[:-1]]) if m else np.empty(0, np.intp)
+    heads = V[starts]
+
+    dp = np.full((n + 1, n), np.inf)
+    parent = np.full((n + 1, n), -1, dtype=np.int32)
+    dp[0] = 0.0
+
+    for k in range(1, n + 1):
+        if m == 0:
+            break
+        cand = dp[k - 1, U] + W
+        dp[k, heads] = np.minimum.reduceat(cand, starts)
+        # an edge attaining its head's minimum is a valid parent (ties: any)
+        hit = np.flatnonzero((cand == dp[k, V]) & (cand < np.inf))
+        parent[k, V[hit]] = U[hit]
+        if np.array_equal(dp[k], dp[k - 1]):
+            return dp, parent, k
+
+    return dp, parent, n
+
+
+def karp_tables(U, V, W, n):
+    """karp_dp when Numba is installed, else karp_dp_vectorized."""
+    if HAVE_NUMBA:
+        return karp_dp(U, V, W, n)
+    return karp_dp_vectorized(U, V, W, n)
+
+
+@njit(cache=True, boundscheck=False)
+def karp_dp_update(U, V, W, n, dp, parent, changed_heads):
+    """
+    Refresh the (dp, parent) tables of an earlier karp_dp run in place, after
+    the edges into changed_heads were added, removed or repriced.
+
+    dp[k][v] can only differ from before if some k-edge walk into v uses a
+    changed edge, i.e. v is a changed head or a successor of a cell that
+    changed in layer k-1. Only that frontier is recomputed, from v's
+    in-edges; every other cell keeps its value and parent.
+    Returns the number of layers filled, as karp_dp.
+    """
+    m = len(U)
+
+    # in-edges grouped by head (ties: first such edge, any one is a valid parent)
+    by_head = np.argsort(V, kind="mergesort")
+    in_ptr = np.zeros(n + 1, np.int64)
+    for e in range(m):
+        in_ptr[V[e] + 1] += 1
+    # out-edges grouped by tail, to grow the frontier
+    by_tail = np.argsort(U, kind="mergesort")
+    out_ptr = np.zeros(n + 1, np.int64)
+    for e in range(m):
+        out_ptr[U[e] + 1] += 1
+    for v in range(n):
+        in_ptr[v + 1] += in_ptr[v]
+        out_ptr[v + 1] += out_ptr[v]
+
+    seed = np.zeros(n, np.bool_)
+    for v in changed_heads:
+        seed[v] = True
+    front = seed.copy()
+
+    for k in range(1, n + 1):
+        prev = dp[k - 1]
+        cur = dp[k]
+        for v in range(n):
+            if not front[v]:
+                continue
+            best = INF
+            p = -1
+            for i in range(in_ptr[v], in_ptr[v + 1]):
+                e = by_head[i]
+                d = prev[U[e]]
+                if d == INF:
+                    continue
+                d += W[e]
+                if d < best:
+                    best = d
+                    p = U[e]
+            cur[v] = best
+            parent[k, v] = p
+
+        same = True
+        for v in range(n):
+            if cur[v] != prev[v]:
+                same = False
+                break
+        if same:
+            return k
+
+        nxt = seed.copy()
+        for u in range(n):
+            if front[u]:
+                for i in range(out_ptr[u], out_ptr[u + 1]):
+                    nxt[V[by_tail[i]]] = True
+        front = nxt
+
+    return n
+
+
+def karp_tables_incremental(U, V, W, n, cache):
+    """
+    karp_tables that keeps the last full tables in `cache` (a dict owned by
+    the caller, for a graph whose node indexing does not change) and, on the
+    next call, only recomputes the cells reachable from the edges that
+    changed in between (karp_dp_update). Needs Numba; otherwise it is
+    karp_tables.
+    """
+    if not HAVE_NUMBA:
+        return karp_tables(U, V, W, n)
+
+    edges = set(zip(U.tolist(), V.tolist(), W.tolist()))
+    prev = cache.pop("tables", None)
+    if prev is not None and prev[0].shape[1] == n:
+        dp, parent, prev_edges = prev
+        changed_heads = np.array(sorted({v for _, v, _ in prev_edges ^ edges}), dtype=np.int64)
+        layers = karp_dp_update(U, V, W, n, dp, parent, changed_heads)
+    else:
+        dp, parent, layers = karp_dp(U, V, W, n)
+
+    # a table cut short at a fixed point is stale past that layer
+    if layers == n:
+        cache["tables"] = (dp, parent, edges)
+    return dp, parent, layers
+
+
+@njit(parallel=True, cache=True)
+def karp_mu(dp, n):
+    """
+    Karp's formula on the tables, compiled: (mu, v_star) with
+    mu = min_v max_k (dp[n][v] - dp[k][v]) / (n - k), skipping layers where
+    dp[k][v] is inf, and v_star = -1 when no node is reached in n steps.
+    Every v is independent, so the max over k runs in parallel over v.
+    """
+    best = np.empty(n)
+    for v in prange(n):
+        if dp[n, v] == INF:
+            best[v] = INF
+            continue
+        hi = -INF
+        for k in range(n):
+            if dp[k, v] != INF:
+                avg = (dp[n, v] - dp[k, v]) / (n - k)
+                if avg > hi:
+                    hi = avg
+        best[v] = hi
+
+    v_star = -1
+    mu = INF
+    for v in range(n):
+        if best[v] < mu:
+            mu = best[v]
+            v_star = v
+    return mu, v_star
+
+
+@njit(cache=True)
+def karp_trace_cycle(parent, v_star, n):
+    """
+    Walk the parents back from v_star at layer n and return the first cycle
+    on that walk as node indices [a, ..., a] (closed), or an empty array.
+    """
+    # path[i] is the node at layer n - i
+    path = np.empty(n + 1, np.int64)
+    length = 0
+    curr = v_star
+    for k in range(n, -1, -1):
+        path[length] = curr
+        length += 1
+        curr = parent[k, curr]
+        if curr == -1:
+            break
+
+    # scan in walk order (reversed path) until a node repeats
+    seen = np.full(n, -1, np.int64)
+    for i in range(length):
+        node = path[length - 1 - i]
+        if seen[node] != -1:
+            cycle = np.empty(i - seen[node] + 1, np.int64)
+            for j in range(seen[node], i + 1):
+                cycle[j - seen[node]] = path[length - 1 - j]
+            return cycle
+        seen[node] = i
+
+    return np.empty(0, np.int64)
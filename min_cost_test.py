@@ -1,6 +1,5 @@
 import networkx as nx
-from copy import deepcopy
-import matplotlib.pyplot as plt
+import sys
 from build_graph_funcs import (
     build_and_draw_graph1,
     build_and_draw_graph2,
@@ -63,11 +62,13 @@ def run_and_print_min_cost_flow(G, name, s, t, amount):
 
 
 if __name__ == "__main__":
-    G1 = build_and_draw_graph1()
-    G2 = build_and_draw_graph2()
-    G3 = build_and_draw_graph3()
-    G4 = build_and_draw_graph4()
-    G20 = build_and_draw_graph20()
+    # figures only with --draw (matplotlib is not imported otherwise)
+    draw = "--draw" in sys.argv[1:]
+    G1 = build_and_draw_graph1(draw=draw)
+    G2 = build_and_draw_graph2(draw=draw)
+    G3 = build_and_draw_graph3(draw=draw)
+    G4 = build_and_draw_graph4(draw=draw)
+    G20 = build_and_draw_graph20(draw=draw)
 
    # ---------- Max Flow ----------
     f1, _ = run_and_print_max_flow(G1, "Graph 1", 0, 5)
@@ -1,6 +1,100 @@
 import math
+from collections import deque
 import networkx as nx
-from typing import Hashable, Tuple, Dict, Any
+import numpy as np
+from typing import Hashable, Tuple, Dict, List
+
+from karp_core import karp_mu, karp_tables, karp_trace_cycle
+from residual_csr import HAVE_NUMBA, njit
+
+# The kernels are compiled eagerly for the one set of array types munchen
+# passes them (int64 indices, int8 directions, float64 costs and distances,
+# bool masks), at import and then from Numba's on-disk cache, so the first
+# run() does not pay for JIT compilation.
+# fastmath is limited to the flags that keep inf intact: dist starts at inf
+# for unreached nodes, which the full fastmath set ("ninf") would not honour.
+_FASTMATH = {"nsz", "arcp", "contract", "reassoc"}
+
+
+@njit("i8(i8[::1], i1[::1], i8[::1], i8[::1], i8, i8)", cache=True, boundscheck=False)
+def _cycle_node(pred_edge, pred_dir, u, v, x, n):
+    """
+    Follow the predecessors n steps back from x. If the chain never ends,
+    the node reached lies on a cycle of the predecessor graph (and such a
+    cycle is negative); return it, else -1.
+    """
+    for _ in range(n):
+        e = pred_edge[x]
+        if e < 0:
+            return -1
+        x = u[e] if pred_dir[x] > 0 else v[e]
+    return x
+
+
+@njit("i8(i8[::1], i8[::1], i8[::1], i1[::1], i8[::1], i8[::1], f8[::1], b1[::1], b1[::1], "
+      "f8[::1], i8[::1], i1[::1], b1[::1], i8)", cache=True, boundscheck=False, fastmath=_FASTMATH)
+def _spfa(row_ptr, col_idx, arc_eid, arc_dir, u, v, w, fwd_live, bwd_live, dist, pred_edge, pred_dir, in_queue, n):
+    """
+    Queue-based Bellman-Ford (SPFA) over the residual arcs of the
+    flat edge arrays: edge k gives u[k] -> v[k] (cost +w[k]) while
+    fwd_live[k] (cap > flow) and v[k] -> u[k] (cost -w[k]) while
+    bwd_live[k] (flow > 0).
+    The arcs leaving x are the BCSR slice row_ptr[x]:row_ptr[x+1] (see
+    _build_csr). Only nodes whose distance just dropped are scanned.
+
+    dist is relaxed in place; pred_edge[x] / pred_dir[x] record the edge and
+    direction (+1/-1) that last lowered dist[x]. The queue starts with the
+    nodes flagged in in_queue, so a search can resume from the state an
+    earlier one left (see _reseed_spfa). Returns a node on a negative
+    cycle, or -1 when the queue runs dry (no negative cycle is reachable
+    from the queued nodes). A node lowered n times triggers a predecessor
+    walk (_cycle_node); if that still ends at a root, the count restarts.
+    On a cycle, in_queue is left flagging every node whose arcs may still
+    relax, including the two the search stopped at.
+    """
+    queue = np.empty(n, np.int64)      # circular, every node at most once
+    count = np.zeros(n, np.int64)
+    head = 0
+    size = 0
+    for x in range(n):
+        if in_queue[x]:
+            queue[size] = x
+            size += 1
+
+    while size:
+        a = queue[head]
+        head = (head + 1) % n
+        size -= 1
+        in_queue[a] = False
+
+        # Forward residual edges a -> v[k] if cap > flow, cost = +weight
+        # and backward residual edges a -> u[k] if flow > 0, cost = -weight
+        for i in range(row_ptr[a], row_ptr[a + 1]):
+            k = arc_eid[i]
+            s = arc_dir[i]
+            if not (fwd_live[k] if s > 0 else bwd_live[k]):
+                continue
+            b = col_idx[i]
+            d = dist[a] + s * w[k]
+            if d < dist[b]:
+                dist[b] = d
+                pred_edge[b] = k
+                pred_dir[b] = s
+                count[b] += 1
+                if count[b] >= n:
+                    x = _cycle_node(pred_edge, pred_dir, u, v, b, n)
+                    if x >= 0:
+                        # a's scan is cut short and b was lowered unqueued
+                        in_queue[a] = True
+                        in_queue[b] = True
+                        return x
+                    count[b] = 0
+                if not in_queue[b]:
+                    in_queue[b] = True
+                    queue[(head + size) % n] = b
+                    size += 1
+
+    return -1
 
 
 class CycleCancellingAlgorithm:
@@ -31,6 +125,7 @@ class CycleCancellingAlgorithm:
         *,
         capacity_attr: str = "capacity",
         weight_attr: str = "weight",
+        min_mean: bool = True,
     ) -> None:
         if not isinstance(G, nx.DiGraph):
             raise TypeError("G must be a networkx.DiGraph")
@@ -45,16 +140,77 @@ class CycleCancellingAlgorithm:
         self.t: Hashable = target
         self.capacity_attr: str = capacity_attr
         self.weight_attr: str = weight_attr
+        # cancel a minimum mean cycle (Goldberg–Tarjan) rather than the
+        # first negative cycle the SPFA runs into
+        self.min_mean: bool = min_mean
+
+        self._build_csr()
+        self._n: int = len(self._nodes)
 
         # Initialize flow on edges
-        for u, v in self.G.edges():
-            self.G[u][v]["flow"] = 0
+        for _, _, data in self._edge_data:
+            data["flow"] = 0
+
+        # Edge flows live in one array indexed by edge id (position in
+        # self._edges); they are written back to G[u][v]["flow"] at the end
+        self._edge_id: Dict[Tuple[Hashable, Hashable], int] = {e: i for i, e in enumerate(self._edges)}
+        self._flow = np.zeros(len(self._edges), dtype=self._cap.dtype)
 
         # State variables similar to JS 'state'
-        self.cycle = []           # list of dicts {edge:(u,v), direction:+1/-1}
+        # the cycle as parallel arrays: edge ids and directions (+1/-1)
+        self._cycle_eids = np.empty(0, dtype=np.int64)
+        self._cycle_dirs = np.empty(0, dtype=np.int8)
         self.cycle_min_flow = 0.0
         self.no_cycle_found = False
 
+    def _build_csr(self) -> None:
+        """
+        Flatten the graph once into edge arrays for the compiled kernels:
+        edge k runs self._u[k] -> self._v[k] (node indices) with capacity
+        self._cap[k] and weight self._w[k]. Neither changes during a run.
+
+        The graph is walked once: self._edge_data keeps the (u, v, data)
+        triples, so later passes reuse the attribute dicts directly.
+        """
+        self._nodes = list(self.G.nodes())
+        self.node_to_idx: Dict[Hashable, int] = {x: i for i, x in enumerate(self._nodes)}
+        self._edge_data = list(self.G.edges(data=True))
+        self._edges = [(a, b) for a, b, _ in self._edge_data]
+
+        m = len(self._edges)
+        idx = self.node_to_idx
+        self._u = np.fromiter((idx[a] for a, _ in self._edges), dtype=np.int64, count=m)
+        self._v = np.fromiter((idx[b] for _, b in self._edges), dtype=np.int64, count=m)
+
+        # Bidirectional CSR: every edge k appears twice, as the arc
+        # u[k] -> v[k] (direction +1) in row u[k] and as v[k] -> u[k]
+        # (direction -1) in row v[k]. Row x, i.e. row_ptr[x]:row_ptr[x+1],
+        # lists its out-edges first, then its in-edges.
+        n = len(self._nodes)
+        tail = np.concatenate((self._u, self._v))
+        order = np.argsort(tail, kind="stable")
+        self._row_ptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tail, minlength=n), out=self._row_ptr[1:])
+        self._col_idx = np.concatenate((self._v, self._u))[order]
+        self._arc_eid = np.concatenate((np.arange(m), np.arange(m)))[order]
+        self._arc_dir = np.repeat(np.array([1, -1], dtype=np.int8), m)[order]
+
+        # The same rows as Python lists of (neighbour, edge id, direction)
+        # tuples, for the max-flow BFS, which runs in plain Python
+        arcs = list(zip(self._col_idx.tolist(), self._arc_eid.tolist(), self._arc_dir.tolist()))
+        row_ptr = self._row_ptr.tolist()
+        self._adj: List[List[Tuple[int, int, int]]] = [arcs[row_ptr[x]:row_ptr[x + 1]] for x in range(n)]
+
+        # np.array keeps integer attributes integral (int64), so the flows
+        # and the cost come out as ints for integer inputs
+        self._cap = np.array([d.get(self.capacity_attr, 0) for _, _, d in self._edge_data])
+        self._w = np.array([d.get(self.weight_attr, 0) for _, _, d in self._edge_data])
+        if m == 0:
+            self._cap = self._cap.astype(np.int64)
+            self._w = self._w.astype(np.int64)
+        # the SPFA kernel is compiled for float64 costs only
+        self._w_float = self._w.astype(np.float64)
+
     # ---------------------------------------------------------
     # Public entry point
     # ---------------------------------------------------------
@@ -69,6 +225,7 @@ class CycleCancellingAlgorithm:
         """
         self._get_max_flow()
         self._main_loop()
+        self._write_back_flows()
 
         flow_dict = self._build_flow_dict()
         min_cost = self._compute_total_cost()
@@ -82,73 +239,100 @@ class CycleCancellingAlgorithm:
         """
         Initialize the flow to a maximum s-t flow using BFS
         in the residual graph, following the JS getMaxFlow().
+
+        The BFS is bidirectional: one search grows from s along residual
+        arcs, one from t against them, a level at a time on whichever
+        frontier is smaller, until a node is labelled by both. Both walk
+        the BCSR rows from _build_csr (as the tuple lists self._adj), on
+        node indices.
         """
 
         # Ensure flow = 0 on all edges (like JS)
-        for u, v in self.G.edges():
-            self.G[u][v]["flow"] = 0
+        self._flow[:] = 0
+        cap_arr, flow_arr = self._cap, self._flow
+        adj = self._adj
+        n = self._n
+
+        def expand(queue, pred, pred_edge, pred_dir, other_pred, from_source):
+            """
+            Scan one BFS level of one side. The s side follows residual arcs
+            node -> x, the t side residual arcs x -> node. Returns the first
+            node the other side has already labelled, or None.
+            """
+            for _ in range(len(queue)):
+                node = queue.popleft()
+
+                for x, eid, arc_dir in adj[node]:
+                    if pred[x] >= 0:
+                        continue
+                    # direction of edge eid on the s -> t path: the t side
+                    # crosses the arc x -> node, the reverse of BCSR's
+                    direction = arc_dir if from_source else -arc_dir
+                    if direction > 0:
+                        residual_capacity = cap_arr[eid] - flow_arr[eid]
+                    else:
+                        residual_capacity = flow_arr[eid]
+                    if residual_capacity > 0:
+                        pred[x] = node
+                        pred_edge[x] = eid
+                        pred_dir[x] = direction
+                        if other_pred[x] >= 0:
+                            return x
+                        queue.append(x)
+            return None
+
+        s_idx = self.node_to_idx[self.s]
+        t_idx = self.node_to_idx[self.t]
+
+        # Labels of each side, by node index, allocated once and reset per
+        # augmenting path:
+        #   pred_f[x] / pred_b[x]: neighbour of x towards s / t; -1 while x
+        #                          is unlabelled, the root points to itself
+        #   edge_f[x] / edge_b[x]: edge id crossed to reach x
+        #   dir_f[x]  / dir_b[x]:  its direction, +1/-1 (on the s -> t path)
+        pred_f = np.empty(n, dtype=np.int64)
+        pred_b = np.empty(n, dtype=np.int64)
+        edge_f = np.empty(n, dtype=np.int64)
+        edge_b = np.empty(n, dtype=np.int64)
+        dir_f = np.empty(n, dtype=np.int8)
+        dir_b = np.empty(n, dtype=np.int8)
 
         while True:
-            # predecessor[node] = {
-            #     "node": previous_node,
-            #     "edge": (u,v),
-            #     "residual_capacity": ...,
-            #     "direction": +1/-1
-            # }
-            predecessor: Dict[Hashable, Dict[str, Any]] = {n: None for n in self.G.nodes()}
-            queue = [self.s]
-            predecessor[self.s] = {"node": None, "edge": None, "residual_capacity": math.inf, "direction": 0}
-
-            # BFS in residual graph
-            while predecessor[self.t] is None and queue:
-                node = queue.pop(0)
-
-                # Forward residual edges: (node -> v) with capacity > flow
-                for _, v, data in self.G.out_edges(node, data=True):
-                    cap = data.get(self.capacity_attr, 0)
-                    flow = data.get("flow", 0)
-                    if cap > flow and predecessor[v] is None:
-                        residual_cap = cap - flow
-                        predecessor[v] = {
-                            "node": node,
-                            "edge": (node, v),
-                            "residual_capacity": residual_cap,
-                            "direction": +1,
-                        }
-                        queue.append(v)
-
-                # Backward residual edges: (u -> node) with flow > 0
-                for u, _, data in self.G.in_edges(node, data=True):
-                    flow = data.get("flow", 0)
-                    if flow > 0 and predecessor[u] is None:
-                        residual_cap = flow
-                        predecessor[u] = {
-                            "node": node,
-                            "edge": (u, node),
-                            "residual_capacity": residual_cap,
-                            "direction": -1,
-                        }
-                        queue.append(u)
-
-            if predecessor[self.t] is None:
+            pred_f.fill(-1)
+            pred_b.fill(-1)
+            pred_f[s_idx] = s_idx
+            pred_b[t_idx] = t_idx
+            qf = deque([s_idx])
+            qb = deque([t_idx])
+
+            # Bidirectional BFS in residual graph
+            meet = None
+            while meet is None and qf and qb:
+                if len(qf) <= len(qb):
+                    meet = expand(qf, pred_f, edge_f, dir_f, pred_b, True)
+                else:
+                    meet = expand(qb, pred_b, edge_b, dir_b, pred_f, False)
+
+            if meet is None:
                 # No augmenting path
                 break
 
-            # Reconstruct path and find bottleneck
-            path = []
-            augmentation = math.inf
-            current = self.t
-            while current != self.s:
-                pred_info = predecessor[current]
-                path.append(pred_info)
-                augmentation = min(augmentation, pred_info["residual_capacity"])
-                current = pred_info["node"]
-
-            # Apply augmentation
-            for step in path:
-                u, v = step["edge"]
-                direction = step["direction"]
-                self.G[u][v]["flow"] = self.G[u][v].get("flow", 0) + direction * augmentation
+            # Splice the two label chains at meet and find the bottleneck
+            path_eid = []
+            path_dir = []
+            for pred, pred_edge, pred_dir, root in ((pred_f, edge_f, dir_f, s_idx), (pred_b, edge_b, dir_b, t_idx)):
+                current = meet
+                while current != root:
+                    path_eid.append(pred_edge[current])
+                    path_dir.append(pred_dir[current])
+                    current = pred[current]
+            eid_arr = np.array(path_eid)
+            dir_arr = np.array(path_dir)
+            residual = np.where(dir_arr > 0, cap_arr[eid_arr] - flow_arr[eid_arr], flow_arr[eid_arr])
+            augmentation = residual.min()
+
+            # Apply augmentation (the path is simple: each edge once)
+            flow_arr[eid_arr] += dir_arr * augmentation
 
         # Finished max flow, like JS: state.current_step = STEP_MAINLOOP
 
@@ -160,6 +344,13 @@ class CycleCancellingAlgorithm:
         Repeatedly try to find a negative cycle in the residual graph
         and adjust flow along it.
         """
+        # Which residual arcs exist: built once from the max flow, then
+        # patched by _adjust_cycle for the edges of each cancelled cycle
+        self._fwd_live = self._cap > self._flow
+        self._bwd_live = self._flow > 0
+        # SPFA state carried from one search to the next (_reseed_spfa)
+        self._spfa_state = None
+
         while True:
             self.no_cycle_found = False
             self._find_negative_cycle()
@@ -178,122 +369,143 @@ class CycleCancellingAlgorithm:
         """
         Translates the JS findNegativeCycle() logic.
 
-        We keep:
-            node_distance[node]  ~ node.state.distance
-            predecessor[node]    ~ node.state.predecessor:
-                {
-                    "prev_node": ...,
-                    "edge": (u,v),
-                    "direction": +1/-1
-                }
+        The cycle is found either as a minimum mean cycle (_min_mean_cycle,
+        with self.min_mean) or as the first negative cycle the SPFA runs
+        into (_first_negative_cycle). Cancelling minimum mean cycles bounds
+        the number of cancellations polynomially (Goldberg–Tarjan).
+        The cycle is kept as two arrays, self._cycle_eids (edge ids) and
+        self._cycle_dirs (+1/-1, the direction each edge is crossed in).
         """
-        # Initialize distances and predecessors
-        node_distance = {n: math.inf for n in self.G.nodes()}
-        predecessor: Dict[Hashable, Dict[str, Any]] = {n: None for n in self.G.nodes()}
-
-        # JS sets target distance = 0
-        node_distance[self.t] = 0.0
-
-        # Relax edges |V| times
-        nodes_list = list(self.G.nodes())
-        num_nodes = len(nodes_list)
-
-        for _ in range(num_nodes):
-            updated = False
-            for u, v, data in self.G.edges(data=True):
-                cap = data.get(self.capacity_attr, 0)
-                flow = data.get("flow", 0)
-                weight = data.get(self.weight_attr, 0)
-
-                # Forward residual edge if cap > flow, cost = +weight
-                if cap > flow and node_distance[u] + weight < node_distance[v]:
-                    node_distance[v] = node_distance[u] + weight
-                    predecessor[v] = {
-                        "prev_node": u,
-                        "edge": (u, v),
-                        "direction": +1,
-                    }
-                    updated = True
-
-                # Backward residual edge if flow > 0, cost = -weight
-                if flow > 0 and node_distance[v] - weight < node_distance[u]:
-                    node_distance[u] = node_distance[v] - weight
-                    predecessor[u] = {
-                        "prev_node": v,
-                        "edge": (u, v),
-                        "direction": -1,
-                    }
-                    updated = True
-
-            if not updated:
-                break  # early stop if no update in this iteration
-
-        # Check for negative cycle: if any edge can still be relaxed
-        has_cycle = False
-        for u, v, data in self.G.edges(data=True):
-            cap = data.get(self.capacity_attr, 0)
-            flow = data.get("flow", 0)
-            weight = data.get(self.weight_attr, 0)
-
-            if cap > flow and node_distance[u] + weight < node_distance[v]:
-                has_cycle = True
-                break
-
-            if flow > 0 and node_distance[v] - weight < node_distance[u]:
-                has_cycle = True
-                break
+        if self.min_mean:
+            found = self._min_mean_cycle()
+        else:
+            found = self._first_negative_cycle()
 
-        self.no_cycle_found = not has_cycle
+        self.no_cycle_found = found is None
 
-        if not has_cycle:
+        if found is None:
             # Nothing else to do
-            self.cycle = []
+            self._cycle_eids = np.empty(0, dtype=np.int64)
+            self._cycle_dirs = np.empty(0, dtype=np.int8)
             self.cycle_min_flow = 0.0
             return
 
-        # JS logic to reconstruct a cycle (somewhat ad-hoc, starting from target)
-        # We mimic it as closely as possible.
-        self.cycle = []
-        self.cycle_min_flow = math.inf
+        self._cycle_eids, self._cycle_dirs = found
 
-        cycle_node_stack = [self.t]
-        searching = True
+        # Determine bottleneck (cycle_min_flow): residual capacity of every
+        # cycle edge at once, cap - flow forward and flow backward
+        eids, dirs = found
+        flow = self._flow[eids]
+        residual = np.where(dirs > 0, self._cap[eids] - flow, flow)
+        self.cycle_min_flow = residual.min()
 
-        while searching:
-            last_node = cycle_node_stack[-1]
-            pred_info = predecessor[last_node]
-            if pred_info is None:
-                # In case the JS code's assumption doesn't hold,
-                # we break to avoid KeyError.
+    def _first_negative_cycle(self):
+        """
+        The search runs compiled as SPFA (_spfa) from the target on the edge
+        arrays from _build_csr, with distances and predecessors as arrays:
+            dist[i]       ~ node.state.distance
+            pred_edge[i]  ~ node.state.predecessor (edge index, -1 if none)
+            pred_dir[i]   ~ its direction, +1/-1
+        Only the first search starts from scratch; later ones resume from
+        the distances the previous one left (_reseed_spfa).
+
+        Returns the cycle as arrays (edge ids, directions), or None if no
+        negative cycle is reachable from the target.
+        """
+        n = self._n
+        u_arr, v_arr = self._u, self._v
+
+        if self._spfa_state is None:
+            # Initialize distances and predecessors
+            dist = np.full(n, math.inf)
+            pred_edge = np.full(n, -1, dtype=np.int64)
+            pred_dir = np.zeros(n, dtype=np.int8)
+            in_queue = np.zeros(n, dtype=np.bool_)
+
+            # JS sets target distance = 0
+            t_idx = self.node_to_idx[self.t]
+            dist[t_idx] = 0.0
+            in_queue[t_idx] = True
+            self._spfa_state = (dist, pred_edge, pred_dir, in_queue)
+        dist, pred_edge, pred_dir, in_queue = self._spfa_state
+
+        # x: a node on a negative cycle of the predecessor graph, or -1.
+        # (The JS code walked back from the target instead, which need not
+        # lead into the cycle and then left the cycle empty for good.)
+        x = _spfa(self._row_ptr, self._col_idx, self._arc_eid, self._arc_dir,
+                  u_arr, v_arr, self._w_float, self._fwd_live, self._bwd_live, dist, pred_edge, pred_dir, in_queue, n)
+        if x < 0:
+            return None
+
+        # x lies on the predecessor cycle (_cycle_node), so one lap around
+        # it visits each cycle node once: no visited-stack to search
+        eids = []
+        dirs = []
+        curr = x
+        while True:
+            e = pred_edge[curr]
+            d = pred_dir[curr]
+            eids.append(e)
+            dirs.append(d)
+            curr = u_arr[e] if d > 0 else v_arr[e]
+            if curr == x:
                 break
+        return np.array(eids, dtype=np.int64), np.array(dirs, dtype=np.int8)
 
-            new_node = pred_info["prev_node"]
-            self.cycle.append(pred_info)
-
-            # check if new_node already in stack
-            if new_node in cycle_node_stack:
-                # remove prefix up to first occurrence of new_node
-                idx = cycle_node_stack.index(new_node)
-                cycle_node_stack = cycle_node_stack[idx:]
-                self.cycle = self.cycle[idx:]
-                searching = False
-            else:
-                cycle_node_stack.append(new_node)
-
-        # Determine bottleneck (cycle_min_flow)
-        for step in self.cycle:
-            u, v = step["edge"]
-            direction = step["direction"]
-            data = self.G[u][v]
-            cap = data.get(self.capacity_attr, 0)
-            flow = data.get("flow", 0)
-
-            if direction == +1:
-                residual_cap = cap - flow
-            else:
-                residual_cap = flow
-
-            self.cycle_min_flow = min(self.cycle_min_flow, residual_cap)
+    def _min_mean_cycle(self):
+        """
+        Karp's minimum mean cycle of the current residual graph, from the
+        shared karp_core kernels (compiled with Numba, NumPy otherwise).
+        Karp starts from every node at once, so this also finds negative
+        cycles the target cannot reach.
+
+        The live residual arcs are listed as flat arrays U -> V with cost W,
+        arc a standing for edge arc_eid[a] in direction arc_dir[a]. Karp
+        returns the cycle as nodes; each hop a -> b is mapped back to the
+        cheapest live arc between them (a DiGraph can have both u -> v and
+        the backward arc of v -> u).
+
+        Returns the cycle as arrays (edge ids, directions), or None if the
+        minimum mean is not negative.
+        """
+        n = self._n
+        fwd = np.flatnonzero(self._fwd_live)
+        bwd = np.flatnonzero(self._bwd_live)
+        U = np.concatenate((self._u[fwd], self._v[bwd]))
+        V = np.concatenate((self._v[fwd], self._u[bwd]))
+        W = np.concatenate((self._w_float[fwd], -self._w_float[bwd]))
+        arc_eid = np.concatenate((fwd, bwd))
+        arc_dir = np.concatenate((np.ones(len(fwd), np.int8), -np.ones(len(bwd), np.int8)))
+
+        dp, parent, layers = karp_tables(U, V, W, n)
+        if layers < n:
+            return None
+
+        # Karp's formula: mu = min_v max_k (dp[n][v] - dp[k][v]) / (n - k)
+        if HAVE_NUMBA:
+            mu, v_star = karp_mu(dp, n)
+        else:
+            with np.errstate(invalid="ignore"):
+                avg = (dp[n] - dp[:n]) / (n - np.arange(n))[:, None]
+            avg[np.isinf(dp[:n])] = -np.inf
+            max_avg = avg.max(axis=0)
+            max_avg[np.isinf(dp[n])] = np.inf
+            v_star = int(np.argmin(max_avg))
+            mu = max_avg[v_star]
+            if mu == np.inf:
+                v_star = -1
+        if v_star < 0 or mu >= 0:
+            return None
+
+        nodes = karp_trace_cycle(parent, v_star, n).tolist()
+        arcs = []
+        for a, b in zip(nodes, nodes[1:]):
+            cand = np.flatnonzero((U == a) & (V == b))
+            arcs.append(cand[np.argmin(W[cand])])
+        # an empty trace or a rounding-level mean: nothing left to cancel
+        if not arcs or W[arcs].sum() >= 0:
+            return None
+        return arc_eid[arcs], arc_dir[arcs]
 
     # ---------------------------------------------------------
     # Adjust flow along found cycle
@@ -302,39 +514,69 @@ class CycleCancellingAlgorithm:
         """
         Adjust flow using the found negative cycle, like JS adjustCycle().
         """
-        if not self.cycle or self.cycle_min_flow <= 0:
+        eid_arr = self._cycle_eids
+        if not len(eid_arr) or self.cycle_min_flow <= 0:
             return
 
-        for step in self.cycle:
-            u, v = step["edge"]
-            direction = step["direction"]
-            self.G[u][v]["flow"] = self.G[u][v].get("flow", 0) + direction * self.cycle_min_flow
+        # a simple cycle uses each edge once, so fancy-index += is safe
+        self._flow[eid_arr] += self._cycle_dirs * self.cycle_min_flow
+        self._fwd_live[eid_arr] = self._cap[eid_arr] > self._flow[eid_arr]
+        self._bwd_live[eid_arr] = self._flow[eid_arr] > 0
+        if self._spfa_state is not None:
+            self._reseed_spfa(eid_arr)
 
         # Reset cycle state
-        self.cycle = []
+        self._cycle_eids = np.empty(0, dtype=np.int64)
+        self._cycle_dirs = np.empty(0, dtype=np.int8)
         self.cycle_min_flow = 0.0
 
+    def _reseed_spfa(self, eid_arr) -> None:
+        """
+        Prepare the kept SPFA state for the next search after the edges
+        eid_arr had their flow changed, instead of starting over from inf.
+
+        Distances only ever decrease along arcs that still exist, so every
+        predecessor arc that is still live keeps dist[v] >= dist[p] + w and
+        a predecessor cycle stays negative. Predecessors over arcs that the
+        cancellation removed are dropped. Arcs can only have appeared at the
+        changed edges, so their endpoints join the nodes the last search
+        left queued; relaxing from those restores the invariant the full
+        search ends with.
+        """
+        dist, pred_edge, pred_dir, in_queue = self._spfa_state
+        in_queue[self._u[eid_arr]] = True
+        in_queue[self._v[eid_arr]] = True
+
+        has = np.flatnonzero(pred_edge >= 0)
+        e = pred_edge[has]
+        live = np.where(pred_dir[has] > 0, self._fwd_live[e], self._bwd_live[e])
+        pred_edge[has[~live]] = -1
+
     # ---------------------------------------------------------
     # Helpers
     # ---------------------------------------------------------
+    def _write_back_flows(self) -> None:
+        """
+        Copy the flow array back into the edge attribute G[u][v]["flow"].
+        """
+        for (_, _, data), f in zip(self._edge_data, self._flow.tolist()):
+            data["flow"] = f
+
     def _compute_total_cost(self) -> float:
         """
-        Total cost = sum_e flow_e * weight_e
+        Total cost = sum_e flow_e * weight_e, one dot product of the
+        flow and weight arrays.
         """
-        total_cost = 0.0
-        for u, v, data in self.G.edges(data=True):
-            flow = data.get("flow", 0)
-            weight = data.get(self.weight_attr, 0)
-            total_cost += flow * weight
-        return total_cost
+        return float(np.dot(self._flow, self._w))
 
     def _build_flow_dict(self) -> Dict[Hashable, Dict[Hashable, float]]:
         """
-        Build a flow_dict in the style of networkx.maximum_flow.
+        Build a flow_dict in the style of networkx.maximum_flow,
+        from the flow array and the cached edge list.
         """
-        flow_dict: Dict[Hashable, Dict[Hashable, float]] = {u: {} for u in self.G.nodes()}
-        for u, v, data in self.G.edges(data=True):
-            flow_dict[u][v] = data.get("flow", 0)
+        flow_dict: Dict[Hashable, Dict[Hashable, float]] = {u: {} for u in self._nodes}
+        for (u, v), f in zip(self._edges, self._flow.tolist()):
+            flow_dict[u][v] = f
         return flow_dict
     
 def cycle_cancelling(
@@ -345,11 +587,14 @@ def cycle_cancelling(
     weight: str = "weight",
     flow_func=None,                 # kept for compatibility, not used
     capacity: str = "capacity",
-    negative_cycle_func=None        # kept for compatibility, not used
+    negative_cycle_func=None,       # kept for compatibility, not used
+    min_mean: bool = True,
 ) -> Tuple[Dict[Hashable, Dict[Hashable, float]], float]:
     """
     Compatibility wrapper so you can call this exactly like your
     previous `cycle_cancelling` from MultiR.
+    min_mean=False cancels the first negative cycle found instead of a
+    minimum mean one.
     """
     algo = CycleCancellingAlgorithm(
         G,
@@ -357,5 +602,6 @@ def cycle_cancelling(
         target=t,
         capacity_attr=capacity,
         weight_attr=weight,
+        min_mean=min_mean,
     )
     return algo.run()
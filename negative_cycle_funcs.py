@@ -0,0 +1,99 @@
+import networkx as nx
+import numpy as np
+from networkx.algorithms.shortest_paths.weighted import _inner_bellman_ford, _weight_function
+
+from residual_csr import bellman_ford_negcycle
+
+
+def find_negative_cycle(G, source, weight="weight"):
+    """
+    Drop-in replacement for nx.find_negative_cycle(G, source, weight).
+
+    Runs NetworkX's queue-based Bellman–Ford with the "recent update"
+    heuristic switched on explicitly (it stops as soon as a relaxation closes
+    a cycle on the current update path, instead of waiting for a node to be
+    queued n times).
+
+    The cycle is then read off the strict predecessors only (pred[v][0], the
+    node that last lowered dist[v]). Any cycle in that predecessor graph has
+    negative cost. nx.find_negative_cycle instead searches all equal-distance
+    predecessors, which can return a zero-cost cycle such as [1, 5, 1] and
+    leaves cycle cancelling looping on it forever.
+
+    Returns:
+        cycle as [v0, v1, ..., v0]
+
+    Raises:
+        nx.NetworkXError if no negative cycle is reachable from source.
+    """
+    weight_fn = _weight_function(G, weight)
+    pred = {source: []}
+    dist = {source: 0}
+
+    v = _inner_bellman_ford(G, [source], weight_fn, pred=pred, dist=dist, heuristic=True)
+    if v is None:
+        raise nx.NetworkXError("No negative cycles detected.")
+
+    # When the heuristic fires, the closing predecessor u is appended to
+    # pred[v] without lowering dist[v]; otherwise (v queued n times) the
+    # strict predecessor of v is still pred[v][0].
+    u = pred[v][-1]
+    if dist[u] + weight_fn(u, v, G[u][v]) < dist[v]:
+        parent_of_v = u
+    else:
+        parent_of_v = pred[v][0]
+
+    # walk the strict predecessors back from v until a node repeats
+    walk = [v]
+    seen = {v: 0}
+    node = parent_of_v
+    while node not in seen:
+        seen[node] = len(walk)
+        walk.append(node)
+        if not pred[node]:
+            raise nx.NetworkXError("Negative cycle is detected but not found.")
+        node = parent_of_v if node == v else pred[node][0]
+
+    # walk[seen[node]:] runs backwards around the cycle
+    cycle = walk[seen[node]:][::-1]
+    cycle.append(cycle[0])
+    return cycle
+
+
+def compiled_find_negative_cycle(G, source=None, weight="weight"):
+    """
+    Drop-in negative_cycle_func running the compiled Bellman–Ford
+    (residual_csr.bellman_ford_negcycle) on CSR arrays built from G.
+
+    It starts from a virtual super-source (every node at distance 0), so
+    `source` is ignored and a negative cycle is found in whichever component
+    it lies, even when G is not connected.
+
+    Returns:
+        cycle as [v0, v1, ..., v0]
+
+    Raises:
+        nx.NetworkXError if G has no negative cycle.
+    """
+    weight_fn = _weight_function(G, weight)
+    nodes = list(G)
+    idx = {v: i for i, v in enumerate(nodes)}
+    m = G.number_of_edges()
+
+    tail = np.fromiter((idx[u] for u, _ in G.edges()), dtype=np.int64, count=m)
+    head = np.fromiter((idx[v] for _, v in G.edges()), dtype=np.int64, count=m)
+    cost = np.fromiter((weight_fn(u, v, d) for u, v, d in G.edges(data=True)), dtype=np.float64, count=m)
+
+    # group the arcs by tail (CSR)
+    order = np.argsort(tail, kind="stable")
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tail, minlength=len(nodes)), out=indptr[1:])
+
+    arcs = bellman_ford_negcycle(indptr, tail[order], head[order], cost[order],
+                                 np.ones(m, dtype=np.bool_), len(nodes), -1)
+    if len(arcs) == 0:
+        raise nx.NetworkXError("No negative cycles detected.")
+
+    cycle = [nodes[u] for u in tail[order][arcs].tolist()]
+    cycle.append(cycle[0])
+    return cycle
@@ -1,46 +1,40 @@
-def print_residual_graph_state(R, cycle=None):
+import sys
+
+
+def print_residual_graph_state(R, cycle=None, sort=True, meta=None):
     """
     Prints the state of the residual graph to the console for a given iteration.
+    Edges are ordered by (u, v); sort=False keeps R's order.
+    Capacities come from meta[(u, v)][1] when given (cycle_cancelling_MM's R_meta),
+    else from the "capacity" edge attribute.
     """
-    print(f"\n========================================================")
-    print(f"========================================================")
-    
+    lines = ["", "========================================================",
+             "========================================================"]
+
     # 1. Print cycle information if found
     if cycle:
-        cycle_edges = []
-        cycle_cost = 0
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            # Use .get for safety, although the cycle should only contain existing edges
-            weight = R[u][v].get("weight", 0)
-            cycle_cost += weight
-            cycle_edges.append(f"({u} -> {v})")
-            
-        print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
+        # Use .get for safety, although the cycle should only contain existing edges
+        cycle_cost = sum(R[cycle[i]][cycle[i + 1]].get("weight", 0) for i in range(len(cycle) - 1))
+        lines.append(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
     else:
-        print("No Negative Cycle Found. Termination condition met.")
+        lines.append("No Negative Cycle Found. Termination condition met.")
 
     # 2. Print all residual edges
-    print("\nResidual Edges (u -> v: Cap, Cost):")
-    edges_to_print = []
+    lines.append("\nResidual Edges (u -> v: Cap, Cost):")
+    cycle_edge_set = frozenset((cycle[i], cycle[i + 1]) for i in range(len(cycle) - 1)) if cycle else frozenset()
+    rows = []
     for u, v, data in R.edges(data=True):
-        cap = data["capacity"]
-        weight = data["weight"]
-        # Highlight cycle edges in the printout
-        if cycle:
-            is_cycle_edge = False
-            for i in range(len(cycle) - 1):
-                if (u, v) == (cycle[i], cycle[i+1]):
-                    is_cycle_edge = True
-                    break
-            
-            label = f"   * {u} -> {v}: ({cap}, {weight})" if is_cycle_edge else f"     {u} -> {v}: ({cap}, {weight})"
-        else:
-            label = f"     {u} -> {v}: ({cap}, {weight})"
-            
-        edges_to_print.append(label)
-        
-    for label in sorted(edges_to_print):
-         print(label)
-    print(f"========================================================\n")
+        cap = meta[(u, v)][1] if meta is not None else data["capacity"]
+        rows.append(((u, v), (u, v) in cycle_edge_set, cap, data["weight"]))
+    if sort:
+        try:
+            rows.sort(key=lambda row: row[0])
+        except TypeError:  # mixed node types: order by their printed form
+            rows.sort(key=lambda row: (str(row[0][0]), str(row[0][1])))
+
+    # Highlight cycle edges in the printout
+    lines.extend(f"{'   * ' if is_cycle else '     '}{u} -> {v}: ({cap}, {weight})"
+                 for (u, v), is_cycle, cap, weight in rows)
+    lines.append("========================================================\n")
+    # one write for the whole block instead of a print per line
+    sys.stdout.write("\n".join(lines) + "\n")
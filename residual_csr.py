@@ -0,0 +1,777 @@
+import functools
+import heapq
+
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import NegativeCycleError, bellman_ford, connected_components, maximum_flow
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional: the kernels then run as plain Python
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+
+def narrow_int(a):
+    """
+    Store an integer column in the narrowest of int16 / int32 / int64 that
+    holds both a and -a (backward arcs carry -weight). Float columns are
+    returned unchanged. The kernels accumulate distances in float64, so
+    narrow columns never overflow there.
+    """
+    if not np.issubdtype(a.dtype, np.integer) or a.size == 0:
+        return a
+    bound = max(abs(int(a.min())), abs(int(a.max())))
+    for dtype in (np.int16, np.int32):
+        if bound < np.iinfo(dtype).max:
+            return a.astype(dtype)
+    return a
+
+
+class ResidualCSR:
+    """
+    Residual graph of G stored as flat NumPy arrays (CSR layout).
+
+    Every original edge k = (u, v) owns two residual arcs:
+        forward  u -> v : cost  w[k], residual capacity cap[k] - flow[k]
+        backward v -> u : cost -w[k], residual capacity flow[k]
+
+    The arcs are grouped by their tail node, so the arcs leaving node i are
+    the slots indptr[i] .. indptr[i+1]-1 of head / cost / edge_id / is_reverse.
+    The structure is built once from G; while cycles are cancelled only the
+    flow[] array changes, so nothing has to be rebuilt per iteration.
+    """
+
+    def __init__(self, G, capacity="capacity", weight="weight"):
+        # --------------------------------------------------------
+        # 1. NODE AND EDGE IDS
+        # --------------------------------------------------------
+        self.nodes = list(G.nodes)
+        self.node_idx = {node: i for i, node in enumerate(self.nodes)}
+        self.n = len(self.nodes)
+
+        # one column per field (struct of arrays), indexed by edge id k;
+        # G.edges yields the edges in the same order on every pass
+        self.m = G.number_of_edges()
+
+        idx = self.node_idx
+        self.edge_u = np.fromiter((idx[u] for u, _ in G.edges()), dtype=np.int64, count=self.m)
+        self.edge_v = np.fromiter((idx[v] for _, v in G.edges()), dtype=np.int64, count=self.m)
+        self.cap = narrow_int(np.array([c for _, _, c in G.edges(data=capacity)]))
+        self.weight = narrow_int(np.array([w for _, _, w in G.edges(data=weight)]))
+        self.flow = np.zeros(self.m, dtype=self.cap.dtype)   # 0 <= flow <= cap
+
+        # --------------------------------------------------------
+        # 2. CSR OVER THE 2m RESIDUAL ARCS
+        # --------------------------------------------------------
+        # slots 0..m-1 are the forward arcs, m..2m-1 the backward arcs
+        tail = np.concatenate((self.edge_u, self.edge_v))
+        order = np.argsort(tail, kind="stable")
+
+        self.indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tail, minlength=self.n), out=self.indptr[1:])
+
+        self.tail = tail[order]
+        self.head = np.concatenate((self.edge_v, self.edge_u))[order]
+        self.cost = np.concatenate((self.weight, -self.weight))[order]
+        self.edge_id = np.concatenate((np.arange(self.m), np.arange(self.m)))[order]
+        self.is_reverse = order >= self.m
+
+        # rev[a]: slot of the paired arc of the same edge (Goldberg-style)
+        slot_of = np.empty(2 * self.m, dtype=np.int64)
+        slot_of[order] = np.arange(2 * self.m)
+        self.rev = slot_of[(order + self.m) % max(2 * self.m, 1)]
+
+    # ------------------------------------------------------------
+    # Flow <-> nested dict
+    # ------------------------------------------------------------
+
+    def set_flow(self, flow_dict):
+        """Load a networkx-style nested flow dict {u: {v: f}} into flow[]."""
+        nodes = self.nodes
+        for k in range(self.m):
+            u = nodes[self.edge_u[k]]
+            v = nodes[self.edge_v[k]]
+            self.flow[k] = flow_dict.get(u, {}).get(v, 0)
+
+    def max_flow(self, s, t):
+        """
+        Load a maximum s-t flow into flow[], computed by SciPy's compiled
+        maximum_flow (Dinic). SciPy only accepts int32 capacities, so callers
+        check integral_capacities() first. Returns the flow value.
+        """
+        graph = csr_matrix(
+            (self.cap.astype(np.int32), (self.edge_u, self.edge_v)),
+            shape=(self.n, self.n),
+        )
+        result = maximum_flow(graph, self.node_idx[s], self.node_idx[t])
+
+        # SciPy reports the net flow per node pair (F[u,v] == -F[v,u]); if G
+        # has both (u, v) and (v, u), the positive side carries all of it
+        net = np.asarray(result.flow.tocsr()[self.edge_u, self.edge_v]).ravel()
+        self.flow[:] = np.maximum(net, 0)
+        self.flow[self.edge_u == self.edge_v] = 0   # self-loops never carry flow
+        return result.flow_value
+
+    def integral_capacities(self):
+        """True if every capacity fits SciPy's int32 max-flow."""
+        return (np.issubdtype(self.cap.dtype, np.integer)
+                and (self.m == 0 or self.cap.max() <= np.iinfo(np.int32).max))
+
+    def flow_dict(self):
+        """Return flow[] as a networkx-style nested dict {u: {v: f}}."""
+        nodes = self.nodes
+        flow = {u: {} for u in nodes}
+        for u, v, f in zip(self.edge_u.tolist(), self.edge_v.tolist(), self.flow.tolist()):
+            flow[nodes[u]][nodes[v]] = f
+        return flow
+
+    def total_cost(self):
+        """Cost of the current flow, sum of flow[k] * weight[k] over the edges of G."""
+        # widen first: narrowed int16 / int32 columns would overflow the dot
+        wide = np.result_type(self.flow.dtype, self.weight.dtype, np.int64)
+        return np.dot(self.flow.astype(wide), self.weight.astype(wide)).item()
+
+    # ------------------------------------------------------------
+    # Residual capacities
+    # ------------------------------------------------------------
+
+    def residual(self, arcs=None):
+        """
+        Residual capacity of the given CSR slots (all slots by default):
+            forward arc  -> cap - flow
+            backward arc -> flow
+        """
+        if arcs is None:
+            arcs = slice(None)
+        k = self.edge_id[arcs]
+        f = self.flow[k]
+        return np.where(self.is_reverse[arcs], f, self.cap[k] - f)
+
+    def has_negative_arc(self):
+        """
+        True if some live residual arc has negative cost. Without one no
+        negative cycle can exist and cycle cancelling has nothing to do —
+        e.g. a zero max-flow (only forward arcs, weights >= 0) or all weights 0.
+        With the non-negative weight check in place these are the only cases;
+        negative input weights (validate=False) make this test cover more.
+        """
+        return bool((self.cost[self.residual() > 0] < 0).any())
+
+    def potential_violations(self, p, cap_mask):
+        """
+        CSR slots of the live arcs (cap_mask set) with p[tail] + cost < p[head].
+        If there are none, p is a feasible potential and the residual graph
+        has no negative cycle (a cycle's reduced costs sum to its cost).
+        """
+        return np.flatnonzero(cap_mask & (p[self.tail] + self.cost < p[self.head]))
+
+    def augment(self, arcs, bottleneck):
+        """Push `bottleneck` units along the given CSR slots (a cycle)."""
+        # forward arc (u→v): +bottleneck on (u, v)
+        # backward arc (v→u): reduce forward flow on (u, v)
+        np.add.at(self.flow, self.edge_id[arcs],
+                  np.where(self.is_reverse[arcs], -bottleneck, bottleneck).astype(self.flow.dtype))
+
+    def cycle_nodes(self, arcs):
+        """Node labels of a cycle given as CSR slots, closed as [v0, ..., v0]."""
+        nodes = self.nodes
+        cycle = [nodes[u] for u in self.tail[arcs].tolist()]
+        cycle.append(cycle[0])
+        return cycle
+
+    def strongly_connected_components(self, nbunch=None, cyclic_only=False):
+        """
+        SCCs of the residual graph (arcs with positive residual capacity) as a
+        list of node sets, computed by SciPy's compiled connected_components.
+        If `nbunch` is given, only the residual subgraph induced by those
+        nodes is split. With cyclic_only, single-node SCCs without a residual
+        self-loop (which cannot hold a cycle) are left out.
+        """
+        live = self.residual() > 0
+        if nbunch is None:
+            inside = np.ones(self.n, dtype=bool)
+        else:
+            inside = np.zeros(self.n, dtype=bool)
+            inside[[self.node_idx[v] for v in nbunch]] = True
+            live &= inside[self.tail] & inside[self.head]
+
+        graph = csr_matrix(
+            (np.ones(np.count_nonzero(live), dtype=np.int8), (self.tail[live], self.head[live])),
+            shape=(self.n, self.n),
+        )
+        _, labels = connected_components(graph, directed=True, connection="strong")
+
+        # group the node ids by label: sort once, then cut at label changes
+        idx = np.flatnonzero(inside)
+        if cyclic_only:
+            size = np.bincount(labels)
+            self_loop = np.zeros(self.n, dtype=bool)
+            self_loop[self.tail[live & (self.tail == self.head)]] = True
+            idx = idx[(size[labels[idx]] > 1) | self_loop[idx]]
+        if idx.size == 0:
+            return []
+        labels = labels[idx]
+        order = np.argsort(labels, kind="stable")
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+
+        nodes = self.nodes
+        return [{nodes[i] for i in group.tolist()} for group in np.split(idx[order], bounds)]
+
+    def to_networkx(self):
+        """
+        Materialize the residual graph as a DiGraph (only arcs with positive
+        residual capacity). If G has both (u, v) and (v, u), two residual arcs
+        may connect the same ordered pair; the cheaper one is kept, which never
+        hides a negative cycle. Each edge stores its CSR slot under "arc".
+        """
+        R = nx.DiGraph()
+        nodes = self.nodes
+        res = self.residual()
+        for a in np.flatnonzero(res > 0).tolist():
+            u = nodes[self.tail[a]]
+            v = nodes[self.head[a]]
+            w = self.cost[a].item()
+            if R.has_edge(u, v) and R[u][v]["weight"] <= w:
+                continue
+            R.add_edge(u, v, capacity=res[a].item(), weight=w, arc=a)
+        return R
+
+    def update_networkx(self, R, arcs):
+        """
+        Patch R (built by to_networkx) in place after the flow changed on the
+        edges of the given CSR slots. Only the ordered pairs those edges join
+        are re-evaluated, with the same cheapest-live-arc rule as to_networkx:
+        edges are re-weighted, added when an arc opens and removed when the
+        last arc of a pair saturates (nodes left without edges are dropped).
+        """
+        nodes = self.nodes
+        both = np.concatenate((arcs, self.rev[arcs]))
+        pairs = set(zip(self.tail[both].tolist(), self.head[both].tolist()))
+
+        for x, y in pairs:
+            lo, hi = self.indptr[x], self.indptr[x + 1]
+            slots = lo + np.flatnonzero(self.head[lo:hi] == y)
+            best = None
+            for a, r in zip(slots.tolist(), self.residual(slots).tolist()):
+                if r > 0 and (best is None or self.cost[a] < self.cost[best[0]]):
+                    best = (a, r)
+
+            u, v = nodes[x], nodes[y]
+            if best is not None:
+                a, r = best
+                R.add_edge(u, v, capacity=r, weight=self.cost[a].item(), arc=a)
+            elif R.has_edge(u, v):
+                R.remove_edge(u, v)
+                for node in (u, v):
+                    if R.degree(node) == 0:
+                        R.remove_node(node)
+
+
+# ------------------------------------------------------------
+# Compiled kernels
+# ------------------------------------------------------------
+
+@njit(cache=True)
+def bellman_ford_negcycle(indptr, tail, head, weight, cap_mask, n, src):
+    """
+    Bellman–Ford from `src` over the CSR residual arcs with cap_mask[a] set.
+    src < 0 starts from a virtual super-source with a 0-cost arc to every
+    node (all distances start at 0), so cycles in any component are found.
+
+    Returns the CSR slots of a negative cycle in traversal order
+    (empty array if no negative cycle is reachable from `src`).
+    """
+    dist = np.full(n, np.inf)
+    if src < 0:
+        dist[:] = 0.0
+    else:
+        dist[src] = 0.0
+    return bellman_ford_negcycle_warm(indptr, tail, head, weight, cap_mask, dist)
+
+
+@njit(cache=True)
+def bellman_ford_negcycle_warm(indptr, tail, head, weight, cap_mask, dist):
+    """
+    Bellman–Ford over the live CSR arcs starting from the given distances,
+    which are relaxed in place and can be fed back into the next call.
+
+    Any finite start values work: without a negative cycle the relaxation
+    settles within n-1 rounds, with one it never does, and a node relaxed in
+    round n still leads into the cycle along pred. Cycle cancelling keeps
+    dist between cancellations — one augment only touches the O(|cycle|)
+    arcs, so most distances are already settled and fewer rounds run.
+    """
+    n = len(dist)
+    pred = np.full(n, -1, np.int64)   # CSR slot of the arc that last relaxed v
+
+    # n-1 relaxation rounds, the n-th round only detects
+    last = -1
+    for it in range(n):
+        last = -1
+        for u in range(n):
+            du = dist[u]
+            if du == np.inf:
+                continue
+            for a in range(indptr[u], indptr[u + 1]):
+                if cap_mask[a] and du + weight[a] < dist[head[a]]:
+                    dist[head[a]] = du + weight[a]
+                    pred[head[a]] = a
+                    last = head[a]
+            if last != -1 and it == n - 1:
+                break               # any relaxation in round n proves a cycle
+        if last == -1:
+            break                   # a quiet round: distances are final, no cycle
+
+    if last == -1:
+        return np.empty(0, np.int64)
+
+    # walk back n times to land inside the cycle
+    v = last
+    for _ in range(n):
+        v = tail[pred[v]]
+
+    # backtrack until v is revisited
+    cycle = []
+    u = v
+    while True:
+        a = pred[u]
+        cycle.append(a)
+        u = tail[a]
+        if u == v:
+            break
+
+    return np.array(cycle[::-1], dtype=np.int64)
+
+
+# graphs up to this many nodes get a generated, unrolled Bellman–Ford when
+# Numba is not installed (see small_negative_cycle)
+SMALL_N = 32
+
+
+@functools.lru_cache(maxsize=64)
+def _unrolled_relaxation(n, tail, head, cost):
+    """
+    Generate one Bellman–Ford specialized for a fixed arc list: the loop
+    over the arcs is unrolled into straight-line code with every tail, head
+    and cost inlined as a constant, so a round runs no inner Python loop.
+    Only the live mask and the distances vary between calls, so the function
+    is compiled once per graph and cached.
+    """
+    lines = ["def relax(live, d, p):",
+             f"    for _ in range({n}):",
+             "        last = -1"]
+    for a, (u, v, w) in enumerate(zip(tail, head, cost)):
+        lines += [f"        if live[{a}]:",
+                  f"            x = d[{u}] + {w!r}",
+                  f"            if x < d[{v}]:",
+                  f"                d[{v}] = x; p[{v}] = {a}; last = {v}"]
+    lines += ["        if last == -1:",
+              "            break",
+              "    return last"]
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["relax"]
+
+
+def small_negative_cycle(tail, head, weight, cap_mask, dist):
+    """
+    Same result as bellman_ford_negcycle_warm (dist is relaxed in place),
+    for small graphs without Numba: runs the generated, unrolled rounds of
+    _unrolled_relaxation on plain Python lists.
+    """
+    n = len(dist)
+    relax = _unrolled_relaxation(n, tuple(tail.tolist()), tuple(head.tolist()), tuple(weight.tolist()))
+    d = dist.tolist()
+    pred = [-1] * n
+    last = relax(cap_mask.tolist(), d, pred)
+    dist[:] = d
+
+    if last == -1:
+        return np.empty(0, np.int64)
+
+    # walk back n times to land inside the cycle
+    v = last
+    for _ in range(n):
+        v = tail[pred[v]]
+
+    # backtrack until v is revisited
+    cycle = []
+    u = v
+    while True:
+        a = pred[u]
+        cycle.append(a)
+        u = tail[a]
+        if u == v:
+            break
+
+    return np.array(cycle[::-1], dtype=np.int64)
+
+
+def scipy_negative_cycle(indptr, tail, head, weight, cap_mask, n, src):
+    """
+    Same arguments and result as bellman_ford_negcycle, without Numba.
+
+    SciPy's compiled bellman_ford decides whether a negative cycle exists
+    (src < 0 adds a real super-source node n with 0-cost arcs to every node).
+    It raises NegativeCycleError without predecessors, so the cycle is then
+    extracted by Bellman–Ford rounds vectorized over the arcs with numpy,
+    stopping as soon as the predecessor graph holds a cycle (every cycle
+    there is negative).
+    """
+    live = np.flatnonzero(cap_mask)
+
+    # SciPy sums duplicate (u, v) entries: keep the cheapest live arc per pair
+    live = live[np.lexsort((weight[live], head[live], tail[live]))]
+    first = np.ones(live.size, dtype=np.bool_)
+    first[1:] = (tail[live][1:] != tail[live][:-1]) | (head[live][1:] != head[live][:-1])
+    live = live[first]
+    t, h, w = tail[live], head[live], weight[live].astype(np.float64)
+
+    # 0-cost arcs are stored as explicit zeros, which csgraph keeps as edges
+    if src < 0:
+        graph = csr_matrix(
+            (np.concatenate((w, np.zeros(n))),
+             (np.concatenate((t, np.full(n, n))), np.concatenate((h, np.arange(n))))),
+            shape=(n + 1, n + 1),
+        )
+        start = n
+    else:
+        graph = csr_matrix((w, (t, h)), shape=(n, n))
+        start = src
+    try:
+        bellman_ford(graph, directed=True, indices=start)
+        return np.empty(0, np.int64)
+    except NegativeCycleError:
+        pass
+
+    dist = np.zeros(n) if src < 0 else np.full(n, np.inf)
+    if src >= 0:
+        dist[src] = 0.0
+    pred = np.full(n, -1, np.int64)     # index into live of the arc into v
+    jumps = max(1, int(np.ceil(np.log2(n + 1))))
+    while True:
+        # one synchronous round: every arc relaxes against last round's dist
+        cand = dist[t] + w
+        new = dist.copy()
+        np.minimum.at(new, h, cand)
+        won = (cand < dist[h]) & (cand == new[h])
+        pred[h[won]] = np.flatnonzero(won)
+        dist = new
+
+        # pointer jumping: follow pred 2**jumps >= n + 1 steps at once
+        # (node n is an absorbing root for nodes without a predecessor)
+        parent = np.append(np.where(pred >= 0, t[np.maximum(pred, 0)], n), n)
+        for _ in range(jumps):
+            parent = parent[parent]
+        on_cycle = np.flatnonzero(parent[:n] != n)
+        if on_cycle.size:
+            break
+
+    # parent[v] is n+ steps up from v, so it lies on the cycle
+    v = parent[on_cycle[0]]
+    cycle = []
+    u = v
+    while True:
+        a = pred[u]
+        cycle.append(live[a])
+        u = t[a]
+        if u == v:
+            break
+
+    return np.array(cycle[::-1], dtype=np.int64)
+
+
+@njit(cache=True)
+def cancel_one_cycle(indptr, tail, head, cost, edge_id, is_reverse, cap, flow, source):
+    """
+    One fused cycle-cancelling step over the CSR residual arcs.
+
+    Residual capacities are derived on the fly from cap[] / flow[] while
+    Bellman–Ford relaxes, so no residual graph is ever materialized. If a
+    negative cycle is found, it is walked once to get the bottleneck and the
+    flow on its edges is updated in place.
+    source < 0 starts from a virtual super-source (every node at distance 0),
+    so cycles anywhere in the graph are found.
+
+    Returns True if a cycle was cancelled, False if none exists.
+    """
+    n = len(indptr) - 1
+    dist = np.full(n, np.inf)
+    pred = np.full(n, -1, np.int64)
+    if source < 0:
+        dist[:] = 0.0
+    else:
+        dist[source] = 0.0
+
+    last = -1
+    for it in range(n):
+        last = -1
+        for u in range(n):
+            du = dist[u]
+            if du == np.inf:
+                continue
+            for a in range(indptr[u], indptr[u + 1]):
+                k = edge_id[a]
+                res = flow[k] if is_reverse[a] else cap[k] - flow[k]
+                if res > 0 and du + cost[a] < dist[head[a]]:
+                    dist[head[a]] = du + cost[a]
+                    pred[head[a]] = a
+                    last = head[a]
+            if last != -1 and it == n - 1:
+                break               # any relaxation in round n proves a cycle
+        if last == -1:
+            break                   # a quiet round: distances are final, no cycle
+
+    if last == -1:
+        return False
+
+    v = last
+    for _ in range(n):
+        v = tail[pred[v]]
+
+    # first walk: bottleneck over the cycle (seeded with the arc into v)
+    k = edge_id[pred[v]]
+    bottleneck = flow[k] if is_reverse[pred[v]] else cap[k] - flow[k]
+    u = tail[pred[v]]
+    while u != v:
+        a = pred[u]
+        k = edge_id[a]
+        res = flow[k] if is_reverse[a] else cap[k] - flow[k]
+        if res < bottleneck:
+            bottleneck = res
+        u = tail[a]
+
+    # second walk: push it around
+    u = v
+    while True:
+        a = pred[u]
+        k = edge_id[a]
+        if is_reverse[a]:
+            flow[k] -= bottleneck
+        else:
+            flow[k] += bottleneck
+        u = tail[a]
+        if u == v:
+            break
+
+    return True
+
+
+@njit(cache=True)
+def successive_shortest_paths(indptr, tail, head, cost, edge_id, is_reverse, cap, flow, s, t):
+    """
+    Min-cost max-flow by successive shortest paths, starting from flow[] = 0.
+
+    The potentials pi are seeded by one Bellman–Ford from a virtual
+    super-source over the live arcs (a single quiet round when all costs are
+    non-negative). Each round then runs Dijkstra (binary heap) on the reduced
+    costs cost[a] + pi[u] - pi[v] >= 0, adds the distances to pi and pushes
+    the bottleneck along the cheapest residual s-t path. Stops when t is no
+    longer reachable.
+
+    Returns False (flow[] untouched) if the edges themselves hold a
+    negative-cost cycle — no potentials exist then, and the caller has to
+    fall back to cycle cancelling. Returns True otherwise.
+    """
+    n = len(indptr) - 1
+    pi = np.zeros(n)
+
+    # Johnson-style potentials: n-1 rounds settle them, a change in round n
+    # means a negative cycle
+    for it in range(n):
+        changed = False
+        for u in range(n):
+            for a in range(indptr[u], indptr[u + 1]):
+                k = edge_id[a]
+                res = flow[k] if is_reverse[a] else cap[k] - flow[k]
+                if res > 0 and pi[u] + cost[a] < pi[head[a]]:
+                    pi[head[a]] = pi[u] + cost[a]
+                    changed = True
+        if not changed:
+            break
+        if it == n - 1:
+            return False
+
+    while True:
+        dist = np.full(n, np.inf)
+        pred = np.full(n, -1, np.int64)
+        done = np.zeros(n, np.bool_)
+        dist[s] = 0.0
+        heap = [(0.0, s)]
+
+        while heap:
+            d, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            for a in range(indptr[u], indptr[u + 1]):
+                k = edge_id[a]
+                res = flow[k] if is_reverse[a] else cap[k] - flow[k]
+                v = head[a]
+                if res <= 0 or done[v]:
+                    continue
+                nd = d + cost[a] + pi[u] - pi[v]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = a
+                    heapq.heappush(heap, (nd, v))
+
+        if dist[t] == np.inf:
+            return True
+
+        # nodes not reached now are never reached again (new residual arcs
+        # only join reached nodes), so their potentials may stay as they are
+        for v in range(n):
+            if dist[v] < np.inf:
+                pi[v] += dist[v]
+
+        # bottleneck along the path, then push it
+        k = edge_id[pred[t]]
+        bottleneck = flow[k] if is_reverse[pred[t]] else cap[k] - flow[k]
+        v = tail[pred[t]]
+        while v != s:
+            a = pred[v]
+            k = edge_id[a]
+            res = flow[k] if is_reverse[a] else cap[k] - flow[k]
+            if res < bottleneck:
+                bottleneck = res
+            v = tail[a]
+
+        v = t
+        while v != s:
+            a = pred[v]
+            k = edge_id[a]
+            if is_reverse[a]:
+                flow[k] -= bottleneck
+            else:
+                flow[k] += bottleneck
+            v = tail[a]
+
+
+@njit(cache=True)
+def karp_min_mean_cycle(indptr, tail, head, cost, cap_mask, nodes):
+    """
+    Karp's minimum mean cycle over the CSR residual arcs with cap_mask[a] set,
+    restricted to the subgraph induced by `nodes` (e.g. one SCC).
+
+    F[k][v] = min cost of a walk of exactly k arcs ending at v, starting
+    anywhere (virtual source), for k = 0..N. The minimum cycle mean is
+    min_v max_k (F[N][v] - F[k][v]) / (N - k); a cycle on the length-N walk
+    to the minimizing v attains it.
+
+    Returns the CSR slots of that cycle in traversal order, or an empty array
+    if the minimum mean is not negative.
+    """
+    n = len(indptr) - 1
+    local = np.full(n, -1, np.int64)
+    label = np.full(n, -1, np.int64)
+    for i in range(len(nodes)):
+        local[nodes[i]] = i
+        label[nodes[i]] = 0
+    return _karp_min_mean_cycle(indptr, tail, head, cost, cap_mask, nodes, local, label, 0)
+
+
+@njit(cache=True)
+def _karp_min_mean_cycle(indptr, tail, head, cost, cap_mask, nodes, local, label, comp):
+    # local[v]: position of v in `nodes`; an arc is inside iff label[head] == comp
+    N = len(nodes)
+    F = np.full((N + 1, N), np.inf)
+    pred = np.full((N + 1, N), -1, np.int64)
+    F[0, :] = 0.0
+
+    for k in range(1, N + 1):
+        for i in range(N):
+            fu = F[k - 1, i]
+            if fu == np.inf:
+                continue
+            u = nodes[i]
+            for a in range(indptr[u], indptr[u + 1]):
+                if label[head[a]] != comp or not cap_mask[a]:
+                    continue
+                j = local[head[a]]
+                if fu + cost[a] < F[k, j]:
+                    F[k, j] = fu + cost[a]
+                    pred[k, j] = a
+
+    # Karp's formula
+    best = np.inf
+    best_v = -1
+    for j in range(N):
+        if F[N, j] == np.inf:
+            continue
+        worst = -np.inf
+        for k in range(N):
+            if F[k, j] < np.inf:
+                mean = (F[N, j] - F[k, j]) / (N - k)
+                if mean > worst:
+                    worst = mean
+        if worst < best:
+            best = worst
+            best_v = j
+
+    if best_v == -1 or best >= 0:
+        return np.empty(0, np.int64)
+
+    # walk back along the length-N walk until a node repeats
+    seen = np.full(N, -1, np.int64)   # level at which each node was visited
+    j = best_v
+    k = N
+    while seen[j] == -1:
+        seen[j] = k
+        j = local[tail[pred[k, j]]]
+        k -= 1
+
+    # the arcs between the two visits of j form the cycle
+    # (re-walked from the later visit down to the earlier one)
+    top = seen[j]
+    cycle = np.empty(top - k, np.int64)
+    v = j
+    level = top
+    for idx in range(top - k - 1, -1, -1):
+        a = pred[level, v]
+        cycle[idx] = a
+        v = local[tail[a]]
+        level -= 1
+
+    return cycle
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def karp_min_mean_cycles(indptr, tail, head, cost, cap_mask, scc_nodes, scc_ptr):
+    """
+    karp_min_mean_cycle for many disjoint node sets (SCCs) at once, one
+    thread per set. Set i is scc_nodes[scc_ptr[i] : scc_ptr[i+1]].
+
+    Returns (cycle_arcs, cycle_len): the cycle of set i, if any, is
+    cycle_arcs[scc_ptr[i] : scc_ptr[i] + cycle_len[i]]. A cycle never has
+    more arcs than its set has nodes, so every set owns a disjoint slice and
+    the threads need no synchronization.
+    """
+    n = len(indptr) - 1
+    num = len(scc_ptr) - 1
+    local = np.full(n, -1, np.int64)
+    label = np.full(n, -1, np.int64)
+    for i in range(num):
+        for p in range(scc_ptr[i], scc_ptr[i + 1]):
+            local[scc_nodes[p]] = p - scc_ptr[i]
+            label[scc_nodes[p]] = i
+
+    cycle_arcs = np.empty(scc_ptr[num], np.int64)
+    cycle_len = np.zeros(num, np.int64)
+    for i in prange(num):
+        lo = scc_ptr[i]
+        arcs = _karp_min_mean_cycle(indptr, tail, head, cost, cap_mask,
+                                    scc_nodes[lo:scc_ptr[i + 1]], local, label, i)
+        cycle_len[i] = len(arcs)
+        cycle_arcs[lo:lo + len(arcs)] = arcs
+
+    return cycle_arcs, cycle_len
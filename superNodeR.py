@@ -1,7 +1,11 @@
 import networkx as nx
-from copy import deepcopy
+from networkx.algorithms.flow import preflow_push
+import numpy as np
 import math
 
+from negative_cycle_funcs import find_negative_cycle
+from print_funcs import print_residual_graph_state
+
 def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
     """
     Finds the minimum mean negative cycle using Karp's Algorithm.
@@ -15,7 +19,6 @@ def find_minimum_mean_negative_cycle(G, source=None, weight="weight"):
     # STEP 1: PREPROCESS -------------------------------------------------------
     # Cycle-cancelling residual graphs are MultiDiGraphs
     # Karp's DP requires a simple DiGraph where we use the cheapest edge
-    print("karp bitch")
     if G.is_multigraph():
         S = nx.DiGraph()
         for u, v, data in G.edges(data=True):
@@ -118,54 +121,8 @@ def print_graph_with_flows(G, flow_dict, capacity_attr="capacity"):
         cap = data.get(capacity_attr, "?")
         print(f"{u} -> {v} | flow = {flow} / capacity = {cap}")
 
-def print_residual_graph_state(R, cycle=None):
-    """
-    Prints the state of the residual graph to the console for a given iteration.
-    """
-    print(f"\n========================================================")
-    print(f"========================================================")
-    
-    # 1. Print cycle information if found
-    if cycle:
-        cycle_edges = []
-        cycle_cost = 0
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            # Use .get for safety, although the cycle should only contain existing edges
-            w = R[u][v].get("weight", 0)
-            cycle_cost += w
-            cycle_edges.append(f"({u} -> {v})")
-            
-        print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
-    else:
-        print("No Negative Cycle Found. Termination condition met.")
-
-    # 2. Print all residual edges
-    print("\nResidual Edges (u -> v: Cap, Cost):")
-    edges_to_print = []
-    for u, v, data in R.edges(data=True):
-        cap = data["capacity"]
-        weight = data["weight"]
-        # Highlight cycle edges in the printout
-        if cycle:
-            is_cycle_edge = False
-            for i in range(len(cycle) - 1):
-                if (u, v) == (cycle[i], cycle[i+1]):
-                    is_cycle_edge = True
-                    break
-            
-            label = f"   * {u} -> {v}: ({cap}, {weight})" if is_cycle_edge else f"     {u} -> {v}: ({cap}, {weight})"
-        else:
-            label = f"     {u} -> {v}: ({cap}, {weight})"
-            
-        edges_to_print.append(label)
-        
-    for label in sorted(edges_to_print):
-         print(label)
-    print(f"========================================================\n")
-
-def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None):
+def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity", negative_cycle_func=None,
+                     debug=False):
     """
     Cycle-Cancelling algorithm for Minimum-Cost Flow.
     
@@ -175,12 +132,15 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         t : target node
         weight : edge attribute for cost
         capacity : edge attribute for capacity
+        flow_func : networkx max-flow routine for the initial flow
+            (default: preflow_push)
+        debug : print the residual graph / progress while cancelling
     
     Returns:
         (flow_dict, min_cost)
     """
     #default_negative_cycle_func = find_minimum_mean_negative_cycle
-    default_negative_cycle_func = nx.find_negative_cycle
+    default_negative_cycle_func = find_negative_cycle
 
     # --------------------------------------------------------
     # 1. PARAMETER VALIDATION
@@ -195,17 +155,23 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     if t not in G.nodes:
         raise ValueError("Target node does not exist in graph.")
 
-    for u, v, data in G.edges(data=True):
-        if capacity not in data:
-            raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
-        if data[capacity] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative capacity.")
-
-        if weight not in data:
-            raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
-        #the algorithm can run on negative too - think of delete it
-        if data[weight] < 0:
-            raise ValueError(f"Edge ({u},{v}) has negative weight ({data[weight]}).")
+    # one dict lookup per attribute; None marks a missing one. The raw
+    # adjacency dicts skip the tuple building of G.edges(data=True).
+    for u, nbrs in G._adj.items():
+        for v, data in nbrs.items():
+            c = data.get(capacity)
+            w = data.get(weight)
+
+            if c is None:
+                raise ValueError(f"Edge ({u},{v}) missing capacity attribute.")
+            if c < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative capacity.")
+
+            if w is None:
+                raise ValueError(f"Edge ({u},{v}) missing weight attribute.")
+            #the algorithm can run on negative too - think of delete it
+            if w < 0:
+                raise ValueError(f"Edge ({u},{v}) has negative weight ({w}).")
         
     if negative_cycle_func is None:
         negative_cycle_func = default_negative_cycle_func
@@ -217,26 +183,19 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     # 2. INITIAL MAX-FLOW (IGNORE COSTS)
     # --------------------------------------------------------
     
-    # We temporarily build a capacity-only graph
-    G_cap = nx.DiGraph()
-    for u, v, data in G.edges(data=True):
-        G_cap.add_edge(u, v, capacity=data[capacity])
-
-    max_flow_return = nx.maximum_flow(G_cap, s, t, flow_func=None)  # flow_dict is a nested dict
-    flow_dict = max_flow_return[1]
-
-    
-
-    for u, v in G_cap.edges():
-        # If node u has no outgoing flow dict, create one
-        if u not in flow_dict:
-            flow_dict[u] = {}
-
-        # If edge (u, v) not assigned by max-flow, its flow is 0
-        if v not in flow_dict[u]:
-            flow_dict[u][v] = 0
-
-    #print_graph_with_flows(G_cap, flow_dict)
+    # max-flow only reads the capacity attribute, so run it on G itself
+    max_flow_return = nx.maximum_flow(G, s, t, capacity=capacity, flow_func=flow_func or preflow_push)  # flow_dict is a nested dict
+
+    # flow is kept as one flat array indexed by edge id instead of the
+    # nested dict; edge_index maps (u, v) to that id. Its dtype follows the
+    # capacities (int64 for integer ones, float64 otherwise), so fractional
+    # capacities are never truncated
+    edge_index = {(u, v): k for k, (u, v) in enumerate(G.edges())}
+    flow_dtype = np.array([c for _, _, c in G.edges(data=capacity, default=0)]).dtype
+    if not np.issubdtype(flow_dtype, np.number):
+        flow_dtype = np.float64
+    flow = np.fromiter((max_flow_return[1][u][v] for u, v in G.edges()),
+                       dtype=flow_dtype, count=len(edge_index))
     
 
     # --------------------------------------------------------
@@ -247,27 +206,19 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
         # We use MultiDiGraph because u->v might have a forward residual edge 
         # AND a backward residual edge from the opposite original edge v->u.
         R = nx.DiGraph()
-        print("created empty R")
         for u, v, data in G.edges(data=True):
-            print("residual for started")
             cap = data[capacity]
-            print(f"HERE THE BUG the edges data is: {data} ")
             w = data[weight]
-            print("FUCK WEIGHT")
-            f = flow.get(u, {}).get(v, 0)
-            print("IS THE FLOW THE PROBLEM")
+            f = flow[edge_index[(u, v)]]
 
             # Forward residual edge: can push (cap - f) more flow at cost 'w'
             # for negative cycle, we need only the bwd edge, otherwise we work with an edge without flow
             if f < cap:
                 if R.has_edge(u, v):
-                    print("OR THE EDGE")
                     if R[u][v]["type"] == "bwd":
-                        print("MAYBE THE CONTINUE")
                         continue
                 else:
                     R.add_edge(u, v, weight=w, capacity=cap - f, type='fwd')
-                print("residual fwd added")
             
             # Backward residual edge: can push 'f' back at cost '-w'
             if f > 0:
@@ -275,7 +226,6 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
                     if R[v][u]["type"] == "fwd":
                         R.remove_edge(v, u)
                 R.add_edge(v, u, weight=-w, capacity=f, type='bwd')
-                print("residual bwd added")
 
         R.add_node(super_source)
         for v in list(R.nodes()):
@@ -293,24 +243,18 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
     def augment_cycle(flow, cycle, bottleneck):
         """Increase flow along cycle edges by bottleneck."""
         for i in range(len(cycle)-1):
-            print("augmen for started")
             u = cycle[i]
             v = cycle[i+1]
 
-            if G.has_edge(u, v) and R.has_edge(u,v) and R[u][v]["type"] == "fwd":  
+            if (u, v) in edge_index and R.has_edge(u,v) and R[u][v]["type"] == "fwd":  
                 # forward edge (u→v)
-                flow.setdefault(u, {}).setdefault(v, 0)
-                flow[u][v] += bottleneck
-                print("augmen bottle added")
+                flow[edge_index[(u, v)]] += bottleneck
 
-            elif G.has_edge(v, u) and R.has_edge(u,v) and R[u][v]["type"] == "bwd":  
+            elif (v, u) in edge_index and R.has_edge(u,v) and R[u][v]["type"] == "bwd":  
                 # backward edge (v→u)
-                flow.setdefault(v, {}).setdefault(u, 0)
-                flow[v][u] -= bottleneck  # reduce forward flow
-                print("augmen bottle -")
+                flow[edge_index[(v, u)]] -= bottleneck  # reduce forward flow
 
             else:
-                print("thats the fucking error in augmen")
                 raise RuntimeError("Cycle edge not found in original graph.")
 
     # --------------------------------------------------------
@@ -321,14 +265,13 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
 
         #print_graph_with_flows(G, flow_dict)
 
-        R = build_residual(G, flow_dict, super_source="__SUPER__")
+        R = build_residual(G, flow, super_source="__SUPER__")
 
-        print("BUILT R")
+        if debug:
+            print("BUILT R")
 
         #print_residual_graph_state(R, None)
 
-        cycle_found = False  # will flip to True if we find & cancel a negative cycle
-        
         try:
             cycle = negative_cycle_func(R, "__SUPER__", weight="weight")
         except nx.NetworkXError:
@@ -343,92 +286,32 @@ def cycle_cancelling(G, s, t, weight="weight",flow_func=None, capacity="capacity
             # or strip super node out if your reconstruction includes it.
             raise RuntimeError("Cycle reconstruction included super node; adjust reconstruction to ignore it.")
 
-
-        """
-        # Iterate over strongly connected components of the residual graph
-        for comp in nx.strongly_connected_components(R):
-            print("START SCC FOR")
-            # (optional) Skip trivial SCCs that cannot contain a cycle (no self-loop)
-            if len(comp) == 1:
-                u = next(iter(comp))
-                if not R.has_edge(u, u):
-                    continue
-
-            # Induced subgraph on this SCC
-            subR = R.subgraph(comp).copy()
-            print("COPPIED R")
-            start = next(iter(comp))
-
-            try:
-                # Try to find a negative cycle inside this SCC
-                cycle = negative_cycle_func(subR, start, weight="weight")
-                print("SEARCHING CYCLE DONE")
-                if cycle:
-                    cycle_edges = []
-                    cycle_cost = 0
-                    for i in range(len(cycle) - 1):
-                        u = cycle[i]
-                        v = cycle[i + 1]
-                        # Use .get for safety, although the cycle should only contain existing edges
-                        w = R[u][v].get("weight", 0)
-                        cycle_cost += w
-                        cycle_edges.append(f"({u} -> {v})")
-            
-                    print(f"Negative Cycle Found (Cost: {cycle_cost:.2f}): {' -> '.join(map(str, cycle[:-1]))} -> {cycle[0]}")
-                    print(f"the cycle cost: {cycle_cost}")
-                    if cycle_cost >= 0 :
-                        continue
-                print_residual_graph_state(R, cycle)
-            except nx.NetworkXError:
-                print("NO CYCLE")
-                # No negative cycle reachable from this start node in this SCC
-                continue
-
-            # If we reach here, we found a negative cycle in this SCC.
-            # Nodes/edges are the same as in R, so we use R for capacities.
-            #print_residual_graph_state(R, cycle)
-            """
-            # ---- your bottleneck & augment logic, now "per SCC" ----
-        bottleneck = float("inf")
-        for i in range(len(cycle) - 1):
-            u = cycle[i]
-            v = cycle[i + 1]
-            cap = R[u][v]["capacity"]
-            if cap < bottleneck:
-                bottleneck = cap
-        print(f"the Bottleneck is : {bottleneck}")
+        # R._succ is the raw adjacency dict: one lookup per step, no view layer
+        succ = R._succ
+        bottleneck = min(succ[u][v]["capacity"] for u, v in zip(cycle, cycle[1:]))
+        if debug:
+            print(f"the Bottleneck is : {bottleneck}")
         if bottleneck <= 0:
-            print("IS THE BOTTLE FUCKING NEGATIVE?!")
             raise RuntimeError("Residual bottleneck is non-positive (should not happen).")
 
-        print("BEFORE AUGM")
-        augment_cycle(flow_dict, cycle, bottleneck)
-        print("AFTER AUG")
-
-
-        """
-            cycle_found = True
-            # Important: break here and rebuild residual in the next outer iteration
-            break
+        if debug:
+            print("BEFORE AUGM")
+        augment_cycle(flow, cycle, bottleneck)
+        if debug:
+            print("AFTER AUG")
 
-        if not cycle_found:
-            print("NEED TO ENDDD*******************************************************************************************")
-            # No negative cycle in any SCC ⇒ algorithm terminates
-            #print_residual_graph_state(R, None)
-            break
-        """
 
     # --------------------------------------------------------
     # 5. COMPUTE FINAL MINIMUM COST
     # --------------------------------------------------------
-    print ("calculating min cost")
-    min_cost = 0
-    for u, nbrs in flow_dict.items():
-        print("FLOW FOR")
-        for v, f in nbrs.items():
-            print("CALCULATING")
-            if f > 0:  # only forward flows
-                min_cost += f * G[u][v][weight]
+    if debug:
+        print("calculating min cost")
+    cost = np.array([w for _, _, w in G.edges(data=weight)])
+    min_cost = np.dot(flow, cost).item()
+
+    flow_dict = {u: {} for u in G}
+    for (u, v), k in edge_index.items():
+        flow_dict[u][v] = flow[k].item()
 
     return flow_dict, min_cost
 